@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def rename_duplicates(apps, schema_editor):
+    """Suffix case-insensitive duplicates with their id so the unique index can be built."""
+    Brand = apps.get_model('brand', 'Brand')
+    seen = set()
+    for obj in Brand.objects.order_by('pk'):
+        key = obj.brand_name.lower()
+        if key in seen:
+            suffix = f" ({obj.pk})"
+            obj.brand_name = obj.brand_name[: 80 - len(suffix)] + suffix
+            Brand.objects.filter(pk=obj.pk).update(brand_name=obj.brand_name)
+        seen.add(obj.brand_name.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='brand',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('brand_name'), name='brand_name_ci_unique'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 class Brand(models.Model):
     brand_id = models.AutoField(primary_key=True)
@@ -12,4 +13,7 @@ class Brand(models.Model):
     class Meta:
         db_table = "brands"
         ordering = ["-created_at"]
-        verbose_name_plural = "Brands"
\ No newline at end of file
+        verbose_name_plural = "Brands"
+        constraints = [
+            models.UniqueConstraint(Lower("brand_name"), name="brand_name_ci_unique"),
+        ]
\ No newline at end of file
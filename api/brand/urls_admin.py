@@ -1,7 +1,8 @@
 from django.urls import path
-from .views_admin import brand_admin_list, brand_admin_detail
+from .views_admin import brand_admin_list, brand_admin_detail, brand_admin_batch
 
 urlpatterns = [
     path("", brand_admin_list, name="admin-brand-list"),
+    path("batch/", brand_admin_batch, name="admin-brand-batch"),
     path("<int:id>/", brand_admin_detail, name="admin-brand-detail"),
 ]
\ No newline at end of file
@@ -1,5 +1,10 @@
 from django.http import JsonResponse
-from repository.brand_repository import list_brands
+from api.http_cache import watermark_response
+from repository.brand_repository import list_brands, brand_watermark
 
 def get_all(request):
-    return JsonResponse(list_brands(request.GET), safe=False)
+    watermark = brand_watermark()
+    return watermark_response(
+        request, watermark,
+        lambda: JsonResponse(list_brands(request.GET, watermark), safe=False),
+    )
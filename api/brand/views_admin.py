@@ -3,7 +3,9 @@ from django.http import JsonResponse, HttpResponseNotAllowed
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import IntegrityError, transaction
 from django.utils.timezone import now
+from repository.brand_repository import apply_brand_batch, get_or_create_brand
 from .models import Brand
 
 def _staff_required(view):
@@ -34,10 +36,9 @@ def brand_admin_list(request):
     name = (body.get("brand_name") or "").strip()
     if not name:
         return JsonResponse({"detail": "brand_name is required"}, status=400)
-    if Brand.objects.filter(brand_name__iexact=name).exists():
+    obj, created = get_or_create_brand(name)
+    if not created:
         return JsonResponse({"detail": "brand_name already exists"}, status=400)
-
-    obj = Brand.objects.create(brand_name=name, created_at=now(), updated_at=now())
     return JsonResponse({
         "brand_id": obj.brand_id,
         "brand_name": obj.brand_name,
@@ -67,11 +68,13 @@ def brand_admin_detail(request, id: int):
             name = name.strip()
             if not name:
                 return JsonResponse({"detail": "brand_name cannot be empty"}, status=400)
-            if Brand.objects.exclude(pk=obj.pk).filter(brand_name__iexact=name).exists():
-                return JsonResponse({"detail": "brand_name already exists"}, status=400)
             obj.brand_name = name
         obj.updated_at = now()
-        obj.save()
+        try:
+            with transaction.atomic():
+                obj.save()
+        except IntegrityError:
+            return JsonResponse({"detail": "brand_name already exists"}, status=400)
         return JsonResponse({
             "brand_id": obj.brand_id, "brand_name": obj.brand_name,
             "created_at": obj.created_at, "updated_at": obj.updated_at
@@ -82,3 +85,19 @@ def brand_admin_detail(request, id: int):
         return JsonResponse({"detail": "deleted"}, status=204)
 
     return HttpResponseNotAllowed(["GET", "PUT", "PATCH", "DELETE"])
+
+# @_staff_required
+@require_http_methods(["POST"])
+@csrf_exempt
+def brand_admin_batch(request):
+    """
+    POST a list of {"op": "create"|"update"|"delete", ...} items (or
+    {"operations": [...]}); returns one result per item, in order.
+    """
+    body = _json_body(request)
+    operations = body.get("operations") if isinstance(body, dict) else body
+    try:
+        results = apply_brand_batch(operations)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return JsonResponse({"results": results})
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def rename_duplicates(apps, schema_editor):
+    """Suffix case-insensitive duplicates among siblings with their id so the unique index can be built."""
+    Category = apps.get_model('category', 'Category')
+    seen = set()
+    for obj in Category.objects.order_by('pk'):
+        key = (obj.parent_id, obj.category_name.lower())
+        if key in seen:
+            suffix = f" ({obj.pk})"
+            obj.category_name = obj.category_name[: 50 - len(suffix)] + suffix
+            Category.objects.filter(pk=obj.pk).update(category_name=obj.category_name)
+        seen.add((obj.parent_id, obj.category_name.lower()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_hierarchy'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('parent', models.Value(0)), django.db.models.functions.text.Lower('category_name'), name='category_name_ci_unique_per_parent'),
+        ),
+    ]
@@ -1,10 +1,21 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Concat, Lower, Substr
 
 # Create your models here.
 
 class Category(models.Model):
     category_id = models.AutoField(primary_key=True)
     category_name = models.CharField(max_length=50)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        db_column='parent_id',
+        related_name='children',
+        null=True, blank=True,
+    )
+    # materialized path of ids, e.g. "/1/4/9/"; a subtree is the range [path, path_end)
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -14,5 +25,39 @@ class Category(models.Model):
     class Meta:
         ordering = ["-created_at"]
         verbose_name_plural="Categories"
+        constraints = [
+            # names are unique among siblings ("Bikes > Mountain" and "Shoes > Mountain"
+            # may coexist); roots share parent 0 since NULLs never compare equal
+            models.UniqueConstraint(
+                Coalesce("parent", Value(0)), Lower("category_name"),
+                name="category_name_ci_unique_per_parent",
+            ),
+        ]
 
+    @staticmethod
+    def path_end(path: str) -> str:
+        # '/' < '0'..'9', so every descendant path sorts below path[:-1] + '0'
+        return path[:-1] + '0'
 
+    def subtree(self):
+        return Category.objects.filter(path__gte=self.path, path__lt=self.path_end(self.path))
+
+    def save(self, *args, **kwargs):
+        parent_path = self.parent.path if self.parent_id else '/'
+        if self.pk and self.parent_id and f"/{self.pk}/" in parent_path:
+            raise ValueError("a category cannot be moved under itself or its descendants")
+        # one transaction: a row left with path='' would match every subtree range
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            old_path = self.path
+            new_path = f"{parent_path}{self.pk}/"
+            if old_path == new_path:
+                return
+            Category.objects.filter(pk=self.pk).update(path=new_path)
+            if old_path:
+                # moved: rewrite the prefix of every descendant in one statement
+                Category.objects.filter(path__gt=old_path, path__lt=self.path_end(old_path)).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1))
+                )
+        self.path = new_path
@@ -1,3 +1,69 @@
+from unittest import mock
+from django.db import IntegrityError
 from django.test import TestCase
+from api.category.models import Category
+from api.product.models import Product
+from repository.category_repository import find_category, get_or_create_category
 
-# Create your tests here.
+
+class CategoryAdminDeleteTests(TestCase):
+    def test_delete_with_children_or_products_is_rejected(self):
+        bikes = Category.objects.create(category_name="Bikes")
+        road = Category.objects.create(category_name="Road", parent=bikes)
+        Product.objects.create(product_name="Racer", category=road, model_year=2020, list_price=1)
+
+        response = self.client.delete(f"/api/admin/category/{bikes.pk}/")
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "still has subcategories"))
+        response = self.client.delete(f"/api/admin/category/{road.pk}/")
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "still referenced by products"))
+        self.assertEqual(Category.objects.count(), 2)
+
+
+class CategoryPathTests(TestCase):
+    def test_failed_save_leaves_no_pathless_row(self):
+        bikes = Category.objects.create(category_name="Bikes")
+        with mock.patch("django.db.models.query.QuerySet.update", side_effect=IntegrityError("boom")):
+            with self.assertRaises(IntegrityError):
+                Category.objects.create(category_name="Road", parent=bikes)
+        self.assertFalse(Category.objects.filter(path="").exists())
+        self.assertEqual(list(bikes.subtree().values_list("category_name", flat=True)), ["Bikes"])
+
+
+class CategoryNameScopeTests(TestCase):
+    def setUp(self):
+        self.bikes = Category.objects.create(category_name="Bikes")
+        self.shoes = Category.objects.create(category_name="Shoes")
+
+    def _create(self, name, parent=None):
+        body = {"category_name": name, "parent_id": parent.pk if parent else None}
+        return self.client.post("/api/admin/category/", body, content_type="application/json")
+
+    def _batch(self, operations):
+        response = self.client.post("/api/admin/category/batch/", operations, content_type="application/json")
+        return [(r["status"], r.get("detail")) for r in response.json()["results"]]
+
+    def test_names_are_unique_among_siblings_only(self):
+        self.assertEqual(self._create("Mountain", self.bikes).status_code, 201)
+        self.assertEqual(self._create("Mountain", self.shoes).status_code, 201)
+        response = self._create("MOUNTAIN", self.bikes)
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "category_name already exists"))
+        self.assertEqual(self._create("bikes").status_code, 400)
+
+    def test_batch_checks_the_parent_a_row_ends_up_under(self):
+        mountain, _ = get_or_create_category("Mountain", self.bikes)
+        other, _ = get_or_create_category("Mountain", self.shoes)
+        self.assertEqual(find_category("mountain", self.shoes), other)
+        self.assertEqual(self._batch([
+            {"op": "update", "category_id": other.pk, "parent_id": self.bikes.pk},
+            {"op": "create", "category_name": "Road", "parent_id": self.bikes.pk},
+            {"op": "create", "category_name": "Road", "parent_id": self.shoes.pk},
+        ]), [(400, "category_name already exists"), (201, None), (201, None)])
+
+        # a node may take the place of a sibling deleted earlier in the same batch
+        self.assertEqual(self._batch([
+            {"op": "delete", "category_id": mountain.pk},
+            {"op": "update", "category_id": other.pk, "parent_id": self.bikes.pk},
+        ]), [(204, None), (200, None)])
+        other.refresh_from_db()
+        self.assertEqual((other.parent_id, other.category_name), (self.bikes.pk, "Mountain"))
+        self.assertEqual(other.path, f"{self.bikes.path}{other.pk}/")
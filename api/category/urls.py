@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.get_all, name='category'),
-]
\ No newline at end of file
+    path('tree/', views.get_tree, name='category-tree'),
+]
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views_admin import category_admin_list, category_admin_detail
+from .views_admin import category_admin_list, category_admin_detail, category_admin_batch
 
 urlpatterns = [
     path("", category_admin_list, name="admin-category-list"),
+    path("batch/", category_admin_batch, name="admin-category-batch"),
     path("<int:id>/", category_admin_detail, name="admin-category-detail"),
 ]
\ No newline at end of file
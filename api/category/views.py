@@ -1,5 +1,14 @@
 from django.http import JsonResponse
-from repository.category_repository import list_categories
+from api.http_cache import catalog_cached, watermark_response
+from repository.category_repository import list_categories, category_watermark, category_tree
 
 def get_all(request):
-    return JsonResponse(list_categories(request.GET), safe=False)
+    watermark = category_watermark()
+    return watermark_response(
+        request, watermark,
+        lambda: JsonResponse(list_categories(request.GET, watermark), safe=False),
+    )
+
+@catalog_cached
+def get_tree(request):
+    return JsonResponse(category_tree(), safe=False)
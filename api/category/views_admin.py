@@ -3,7 +3,10 @@ from django.http import JsonResponse, HttpResponseNotAllowed
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
 from django.utils.timezone import now
+from repository.category_repository import apply_category_batch, get_or_create_category
 from .models import Category
 
 def _staff_required(view):
@@ -15,6 +18,23 @@ def _json_body(request):
     except json.JSONDecodeError:
         return {}
 
+def _parent_from(body):
+    """(parent or None, error response or None) for body["parent_id"]."""
+    parent_id = body.get("parent_id")
+    if parent_id in (None, ""):
+        return None, None
+    try:
+        return Category.objects.get(pk=int(parent_id)), None
+    except (TypeError, ValueError, Category.DoesNotExist):
+        return None, JsonResponse({"detail":"parent_id not found"}, status=400)
+
+def _to_dict(obj):
+    return {
+        "category_id": obj.category_id, "category_name": obj.category_name,
+        "parent_id": obj.parent_id,
+        "created_at": obj.created_at, "updated_at": obj.updated_at
+    }
+
 # @_staff_required
 @require_http_methods(["GET","POST"])
 @csrf_exempt
@@ -25,7 +45,7 @@ def category_admin_list(request):
         if q:
             qs = qs.filter(category_name__icontains=q)
         data = list(qs.order_by("-created_at").values(
-            "category_id","category_name","created_at","updated_at"
+            "category_id","category_name","parent_id","created_at","updated_at"
         ))
         return JsonResponse(data, safe=False)
 
@@ -34,14 +54,13 @@ def category_admin_list(request):
     name = (body.get("category_name") or "").strip()
     if not name:
         return JsonResponse({"detail":"category_name is required"}, status=400)
-    if Category.objects.filter(category_name__iexact=name).exists():
+    parent, error = _parent_from(body)
+    if error:
+        return error
+    obj, created = get_or_create_category(name, parent)
+    if not created:
         return JsonResponse({"detail":"category_name already exists"}, status=400)
-    obj = Category.objects.create(category_name=name, created_at=now(), updated_at=now())
-    return JsonResponse({
-        "category_id": obj.category_id,
-        "category_name": obj.category_name,
-        "created_at": obj.created_at, "updated_at": obj.updated_at
-    }, status=201)
+    return JsonResponse(_to_dict(obj), status=201)
 
 # @_staff_required
 @require_http_methods(["GET","PUT","PATCH","DELETE"])
@@ -53,10 +72,7 @@ def category_admin_detail(request, id: int):
         return JsonResponse({"detail":"Not found"}, status=404)
 
     if request.method == "GET":
-        return JsonResponse({
-            "category_id": obj.category_id, "category_name": obj.category_name,
-            "created_at": obj.created_at, "updated_at": obj.updated_at
-        })
+        return JsonResponse(_to_dict(obj))
 
     if request.method in ("PUT","PATCH"):
         body = _json_body(request)
@@ -65,19 +81,46 @@ def category_admin_detail(request, id: int):
             name = name.strip()
             if not name:
                 return JsonResponse({"detail":"category_name cannot be empty"}, status=400)
-            if Category.objects.exclude(pk=obj.pk)\
-                    .filter(category_name__iexact=name).exists():
-                return JsonResponse({"detail":"category_name already exists"}, status=400)
             obj.category_name = name
+        if "parent_id" in body:
+            parent, error = _parent_from(body)
+            if error:
+                return error
+            obj.parent = parent
         obj.updated_at = now()
-        obj.save()
-        return JsonResponse({
-            "category_id": obj.category_id, "category_name": obj.category_name,
-            "created_at": obj.created_at, "updated_at": obj.updated_at
-        })
+        try:
+            with transaction.atomic():
+                obj.save()
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+        except IntegrityError:
+            return JsonResponse({"detail":"category_name already exists"}, status=400)
+        return JsonResponse(_to_dict(obj))
 
     if request.method == "DELETE":
-        obj.delete()
+        try:
+            obj.delete()
+        except ProtectedError:
+            # children and products both reference a category with PROTECT
+            if obj.children.exists():
+                return JsonResponse({"detail":"still has subcategories"}, status=400)
+            return JsonResponse({"detail":"still referenced by products"}, status=400)
         return JsonResponse({"detail":"deleted"}, status=204)
 
     return HttpResponseNotAllowed(["GET","PUT","PATCH","DELETE"])
+
+# @_staff_required
+@require_http_methods(["POST"])
+@csrf_exempt
+def category_admin_batch(request):
+    """
+    POST a list of {"op": "create"|"update"|"delete", ...} items (or
+    {"operations": [...]}); returns one result per item, in order.
+    """
+    body = _json_body(request)
+    operations = body.get("operations") if isinstance(body, dict) else body
+    try:
+        results = apply_category_batch(operations)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return JsonResponse({"results": results})
@@ -4,3 +4,8 @@ class CustomerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.customer'
     label = 'customer'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from repository.revoked_tokens import start_purge_scheduler
+        start_purge_scheduler()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+import uuid
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from api.rate_limit import buckets
+from api.customer.models import Customer
+from ecommerce.asgi import application
+from repository import password_hashing
+
+READ_URL = "/api/brand/"
+LOGIN_URL = "/api/customer/login/"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"") -> int:
+    """One request straight into the ASGI application; returns the status code."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    status = None
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await asyncio.Future()   # the client never disconnects
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_load(logins: int, reads: int, concurrency: int, user_name: str, password: str) -> dict:
+    """Fire logins and catalog reads interleaved through ecommerce.asgi; latencies in ms per kind."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies = {"login": [], "read": []}
+    body = json.dumps({"user_name": user_name, "password": password}).encode()
+
+    async def one(kind: str):
+        async with slots:
+            started = time.perf_counter()
+            if kind == "login":
+                status = await asgi_request(application, "POST", LOGIN_URL, body)
+            else:
+                status = await asgi_request(application, "GET", READ_URL)
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                raise CommandError(f"{kind} returned {status}")
+
+    total = logins + reads
+    # spread the logins evenly through the reads, whichever there are more of
+    kinds = ["login" if (i + 1) * logins // total > i * logins // total else "read" for i in range(total)]
+    await asyncio.gather(*(one(kind) for kind in kinds))
+    return latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark p50/p99 of logins and catalog reads under a mixed concurrent load, "
+        "hashing inline vs. in the process pool. Creates and removes a throwaway customer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument("--reads", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--workers", default="0,auto",
+                            help="Comma-separated pool sizes to compare; 0 = inline, auto = one per CPU.")
+
+    def handle(self, *args, **options):
+        modes = []
+        for item in options["workers"].split(","):
+            item = item.strip()
+            modes.append(None if item == "auto" else int(item))
+
+        user_name, password = f"bench-{uuid.uuid4().hex[:12]}", uuid.uuid4().hex
+        customer = Customer.objects.create(
+            user_name=user_name, password=make_password(password),
+            first_name="Bench", is_email_verified=True,
+        )
+        # one client logging in as one account would hit RATE_LIMITS long before
+        # the load is interesting; the benchmark measures hashing, not throttling
+        limits_off = override_settings(RATE_LIMITS={})
+        limits_off.enable()
+        try:
+            self.stdout.write(f"{'workers':<8} {'login p50':>10} {'login p99':>10} {'read p50':>9} {'read p99':>9} {'wall s':>7}")
+            for mode in modes:
+                password_hashing.configure(mode)
+                # warm the pool so process start-up isn't measured
+                asyncio.run(run_load(min(2, options["logins"]), 0, 2, user_name, password))
+                started = time.perf_counter()
+                latencies = asyncio.run(run_load(
+                    options["logins"], options["reads"], options["concurrency"], user_name, password,
+                ))
+                wall = time.perf_counter() - started
+                label = "auto" if mode is None else str(mode)
+                self.stdout.write(
+                    f"{label:<8} {percentile(latencies['login'], 50):>10.1f} {percentile(latencies['login'], 99):>10.1f} "
+                    f"{percentile(latencies['read'], 50):>9.1f} {percentile(latencies['read'], 99):>9.1f} {wall:>7.2f}"
+                )
+        finally:
+            limits_off.disable()
+            buckets.clear()
+            password_hashing.configure(None)
+            customer.delete()
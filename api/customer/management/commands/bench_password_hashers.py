@@ -0,0 +1,66 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from repository.password_policy import make_hasher, policy, policy_hasher, WORK_FACTOR_ATTRS
+
+
+def verify_ms(hasher, samples: int) -> float:
+    """Median wall time of one verify() on this machine, in milliseconds."""
+    encoded = hasher.encode("benchmark-password", hasher.salt())
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.verify("benchmark-password", encoded)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verify time per hasher work factor on this hardware, "
+        "to size settings.PASSWORD_POLICIES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--policy", default="customer", help="Policy to report on (default customer).")
+        parser.add_argument("--algorithm", help="Hasher to measure (default: the policy's).")
+        parser.add_argument("--work-factors", default="",
+                            help="Comma-separated work factors to try (default: the policy's).")
+        parser.add_argument("--samples", type=int, default=5)
+        parser.add_argument("--target-ms", type=float,
+                            help="Report the highest measured work factor that verifies within this budget.")
+
+    def handle(self, *args, **options):
+        current = policy_hasher(options["policy"])
+        algorithm = options["algorithm"] or current.algorithm
+        attr = WORK_FACTOR_ATTRS.get(algorithm)
+        try:
+            factors = [int(x) for x in options["work_factors"].split(",") if x.strip()]
+        except ValueError:
+            raise CommandError("--work-factors must be integers")
+        if not factors:
+            factors = [None]
+        elif attr is None:
+            raise CommandError(f"no work factor known for hasher {algorithm!r}")
+
+        self.stdout.write(f"policy {options['policy']!r}: {policy(options['policy']) or 'Django default'}")
+        results = []
+        for factor in factors:
+            try:
+                hasher = make_hasher(algorithm, factor)
+            except ValueError as e:
+                raise CommandError(str(e))
+            effective = getattr(hasher, attr) if attr else "-"
+            ms = verify_ms(hasher, max(1, options["samples"]))
+            results.append((effective, ms))
+            self.stdout.write(f"{algorithm:<14} {attr or 'work factor'}={effective:<10} verify {ms:8.1f} ms")
+
+        if options["target_ms"] is not None:
+            fitting = [r for r in results if r[1] <= options["target_ms"] and r[0] != "-"]
+            if fitting:
+                best = max(fitting, key=lambda r: r[0])
+                self.stdout.write(self.style.SUCCESS(
+                    f"highest {attr} within {options['target_ms']:.0f} ms: {best[0]} ({best[1]:.1f} ms)"
+                ))
+            else:
+                self.stdout.write(self.style.WARNING(f"nothing measured fits {options['target_ms']:.0f} ms"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from repository.revoked_tokens import PURGE_BATCH_SIZE, PURGE_PAUSE, purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired RevokedAuthToken rows in short batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE,
+                            help=f"Rows deleted per transaction (default {PURGE_BATCH_SIZE}).")
+        parser.add_argument("--pause", type=float, default=PURGE_PAUSE,
+                            help=f"Seconds to sleep between batches (default {PURGE_PAUSE}).")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        result = purge_expired(options["batch_size"], max(0.0, options["pause"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {result.deleted} expired tokens in {result.batches} batches, {result.seconds:.2f}s."
+        ))
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from repository.email_outbox import BATCH_SIZE, MAX_ATTEMPTS, deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued customer email over one mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help=f"Messages per connection/batch (default {BATCH_SIZE}).")
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                            help=f"Give up on a message after this many failures (default {MAX_ATTEMPTS}).")
+        parser.add_argument("--loop", type=float, metavar="SECONDS",
+                            help="Keep running, polling the queue every SECONDS when it is empty.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["max_attempts"] < 1:
+            raise CommandError("--batch-size and --max-attempts must be at least 1")
+        while True:
+            totals = [0, 0, 0]
+            # drain everything that is due, one batch at a time
+            while True:
+                result = deliver_pending(options["batch_size"], options["max_attempts"])
+                totals = [t + r for t, r in zip(totals, result)]
+                if sum(result) < options["batch_size"]:
+                    break
+            if any(totals) or not options["loop"]:
+                self.stdout.write(f"sent={totals[0]} retried={totals[1]} failed={totals[2]}")
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(options["loop"])
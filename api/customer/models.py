@@ -1,6 +1,8 @@
 from django.db import models
-from django.contrib.auth.hashers import make_password, check_password
+from django.db.models.functions import Lower
+from django.contrib.auth.hashers import check_password
 from django.utils import timezone
+from repository.password_policy import hash_password
 
 class Customer(models.Model):
     customer_id = models.AutoField(primary_key=True)
@@ -18,26 +20,36 @@ class Customer(models.Model):
     zip_code = models.CharField(max_length=20, blank=True, null=True)
 
     is_email_verified = models.BooleanField(default=False)
+    # embedded in auth tokens; bumping it invalidates every token issued before
+    token_version = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
             models.Index(fields=["user_name"]),
             models.Index(fields=["email"]),
             models.Index(fields=["phone"]),
+            # case-insensitive identity lookups (repository/customer_repository.py)
+            models.Index(Lower("user_name"), name="customer_user_name_ci_idx"),
+            models.Index(Lower("email"), name="customer_email_ci_idx"),
         ]
 
     def __str__(self):
         return (f"{self.first_name} {self.last_name or ''}").strip()
 
     def set_password(self, raw_password: str):
-        self.password = make_password(raw_password)
+        self.password = hash_password("customer", raw_password)
 
     def check_password(self, raw_password: str) -> bool:
         return check_password(raw_password, self.password)
 
+    def revoke_tokens(self):
+        """Log out everywhere: bump token_version atomically on the next save()."""
+        self.token_version = models.F("token_version") + 1
+
     def save(self, *args, **kwargs):
-        if self.password and "$" not in self.password:
-            self.password = make_password(self.password)
+        # instances rebuilt from the auth cache have the password deferred
+        if "password" not in self.get_deferred_fields() and self.password and "$" not in self.password:
+            self.password = hash_password("customer", self.password)
         super().save(*args, **kwargs)
 
 class RevokedAuthToken(models.Model):
@@ -51,4 +63,30 @@ class RevokedAuthToken(models.Model):
         ]
 
     def is_active(self) -> bool:
-        return self.expires_at > timezone.now()
\ No newline at end of file
+        return self.expires_at > timezone.now()
+
+
+class OutboundEmail(models.Model):
+    """Mail queued by the request path and delivered by `manage.py send_queued_email`."""
+    PENDING, SENT, FAILED = "pending", "sent", "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True, null=True)
+    recipients = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True, default="", db_index=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from repository.auth_cache import forget_customer
+from .models import Customer
+
+# admin edits, password resets and deletes all go through save()/delete()
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def customer_changed(sender, instance, **kwargs):
+    forget_customer(instance.pk)
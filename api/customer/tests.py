@@ -1,3 +1,184 @@
-from django.test import TestCase
+import hashlib
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api.customer.models import Customer, OutboundEmail, RevokedAuthToken
+from api.customer.views_auth import _issue_token
+from repository import auth_cache
+from repository.auth_cache import cached_token, clear_tokens, remember_token
+from repository.customer_repository import identity_conflict
+from repository.email_outbox import deliver_pending, enqueue
+from repository.password_policy import hash_password
+from repository import revoked_tokens
+from repository.revoked_tokens import is_revoked, purge_expired, reset_revocations
 
-# Create your tests here.
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that counts sessions and fails the messages it's told to."""
+
+    def __init__(self, fail_subjects=(), fail_reopen=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_subjects, self.fail_reopen = set(fail_subjects), fail_reopen
+        self.opened = self.session = 0
+
+    def open(self):
+        if self.fail_reopen and self.opened:
+            raise OSError("connection refused")
+        self.opened += 1
+        self.session = self.opened
+        return True
+
+    def close(self):
+        self.session = 0
+
+    def send_messages(self, messages):
+        if not self.session:
+            raise AssertionError("sent without an open session")
+        if any(m.subject in self.fail_subjects for m in messages):
+            raise OSError("broken pipe")
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        for subject in ("one", "two", "three", "four"):
+            enqueue(subject, "body", ["a@example.com"])
+
+    def test_failed_send_reopens_one_session_for_the_rest(self):
+        backend = FlakyBackend(fail_subjects={"two"})
+        result = deliver_pending(connection=backend)
+        self.assertEqual((result.sent, result.retried, result.failed), (3, 1, 0))
+        self.assertEqual(backend.opened, 2)
+
+    def test_rest_of_batch_backs_off_when_reopen_fails(self):
+        backend = FlakyBackend(fail_subjects={"two"}, fail_reopen=True)
+        result = deliver_pending(connection=backend)
+        self.assertEqual((result.sent, result.retried, result.failed), (1, 3, 0))
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count(), 3)
+
+
+class AuthTokenCacheTests(TestCase):
+    def setUp(self):
+        clear_tokens()
+        cache.clear()
+        self.customer = Customer.objects.create(user_name="alice", first_name="Alice", password="pw")
+
+    def _remember(self, fingerprint="fp"):
+        remember_token(fingerprint, {"id": self.customer.pk, "v": 0}, self.customer, time.time() + 3600)
+        return auth_cache._cache.get(fingerprint)
+
+    def test_hit_is_dropped_once_the_customer_changes_in_another_worker(self):
+        entry = self._remember()
+        self.assertIsNotNone(cached_token("fp"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.revoke_tokens()
+            self.customer.save(update_fields=["token_version"])
+        # this worker's LRU still holding the old snapshot stands in for another worker
+        auth_cache._cache.put("fp", entry)
+        self.assertIsNone(cached_token("fp"))
+        self.assertIsNone(auth_cache._cache.get("fp"))
+
+    def test_hit_without_a_shared_version_goes_back_to_the_db(self):
+        self._remember()
+        cache.clear()
+        self.assertIsNone(cached_token("fp"))
+
+
+def _fingerprint(name):
+    return hashlib.sha256(name.encode()).hexdigest()
+
+@override_settings(REVOKED_TOKEN_REFRESH_SECONDS=3600)
+class RevocationFilterTests(TestCase):
+    def setUp(self):
+        clear_tokens()
+        cache.clear()
+        reset_revocations()
+        self.customer = Customer.objects.create(user_name="alice", first_name="Alice", password="pw")
+
+    def test_token_is_rejected_after_logout(self):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {_issue_token(self.customer)}"}
+        self.assertEqual(self.client.get("/api/customer/me/", **auth).status_code, 200)
+        self.assertEqual(self.client.post("/api/customer/logout/", **auth).status_code, 200)
+
+        response = self.client.get("/api/customer/me/", **auth)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["detail"], "Token revoked")
+
+    def test_filter_miss_does_not_query(self):
+        self.assertFalse(is_revoked(_fingerprint("warm-up")))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked(_fingerprint("live")))
+
+    def test_poll_picks_up_rows_from_other_workers(self):
+        self.assertFalse(is_revoked(_fingerprint("warm-up")))
+        # written straight to the table, as a logout in another worker would
+        RevokedAuthToken.objects.create(
+            fingerprint=_fingerprint("elsewhere"), expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertFalse(is_revoked(_fingerprint("elsewhere")))
+        with override_settings(REVOKED_TOKEN_REFRESH_SECONDS=0):
+            self.assertTrue(is_revoked(_fingerprint("elsewhere")))
+
+    def test_purge_removes_only_expired_rows(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        for name in ("old-1", "old-2", "old-3", "live-1", "live-2"):
+            RevokedAuthToken.objects.create(fingerprint=_fingerprint(name), expires_at=expires_at)
+        self.assertTrue(revoked_tokens._filter.might_contain(_fingerprint("old-1")))
+        expired = [_fingerprint(f"old-{i}") for i in (1, 2, 3)]
+        RevokedAuthToken.objects.filter(fingerprint__in=expired).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        result = purge_expired(batch_size=2, pause=0)
+
+        self.assertEqual((result.deleted, result.batches), (3, 2))
+        self.assertEqual(
+            set(RevokedAuthToken.objects.values_list("fingerprint", flat=True)),
+            {_fingerprint("live-1"), _fingerprint("live-2")},
+        )
+        for fingerprint in expired:
+            self.assertFalse(revoked_tokens._filter.might_contain(fingerprint))
+        self.assertTrue(is_revoked(_fingerprint("live-1")))
+
+
+@override_settings(PASSWORD_HASH_WORKERS=0, RATE_LIMITS={})
+class CustomerIdentityTests(TestCase):
+    def setUp(self):
+        self.alice = Customer.objects.create(
+            user_name="Alice", first_name="Alice", email="alice@example.com",
+            password=hash_password("customer", "secret"), is_email_verified=True,
+        )
+
+    def _register(self, user_name, email):
+        return self.client.post(
+            "/api/customer/register/",
+            {"user_name": user_name, "password": "secret", "first_name": "X", "email": email},
+            content_type="application/json",
+        )
+
+    def test_login_ignores_user_name_case(self):
+        response = self.client.post(
+            "/api/customer/login/", {"user_name": "aLICE", "password": "secret"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["customer"]["customer_id"], self.alice.pk)
+
+    def test_registration_conflicts_ignore_case(self):
+        response = self._register("ALICE", "new@example.com")
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "user_name already exists"))
+        response = self._register("bob", "Alice@Example.COM")
+        self.assertEqual((response.status_code, response.json()["detail"]), (400, "email already in use"))
+
+    def test_duplicate_legacy_emails_report_the_right_field(self):
+        Customer.objects.create(user_name="alice2", first_name="A", email="ALICE@example.com", password="pw")
+        Customer.objects.create(user_name="carol", first_name="C", email="carol@example.com", password="pw")
+        self.assertEqual(identity_conflict("bob", "alice@example.com"), "email")
+        self.assertEqual(identity_conflict("CAROL", "alice@example.com"), "user_name")
+
+    def test_exclude_pk_skips_the_customer_being_edited(self):
+        self.assertIsNone(identity_conflict("alice", "ALICE@example.com", exclude_pk=self.alice.pk))
+        self.assertEqual(identity_conflict("alice", None), "user_name")
+        self.assertIsNone(identity_conflict(None, None))
@@ -3,7 +3,7 @@ from .views import (
     customer_register, customer_confirm_email, customer_resend_confirmation
 )
 from .views_auth import (
-    customer_login, customer_me, customer_logout
+    customer_login, customer_me, customer_logout, customer_logout_all
 )
 from .views_password import (
     password_reset_request, password_reset_confirm,
@@ -17,6 +17,7 @@ urlpatterns = [
     path('login/', customer_login, name='customer-login'),
     path('me/', customer_me, name='customer-me'),
     path('logout/', customer_logout, name='customer-logout'),
+    path('logout/all/', customer_logout_all, name='customer-logout-all'),
 
     path('password/reset/', password_reset_request, name='customer-password-reset-request'),
     path('password/reset/confirm/', password_reset_confirm, name='customer-password-reset-confirm'),
@@ -4,9 +4,13 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core import signing
-from django.core.mail import send_mail
 from django.urls import reverse
 from django.db.models import Q
+from asgiref.sync import sync_to_async
+from repository.customer_repository import aidentity_conflict, by_email, by_user_name
+from repository.email_outbox import enqueue
+from repository.password_hashing import amake_password
+from api.rate_limit import rate_limited
 from .models import Customer
 
 # cấu hình token
@@ -32,11 +36,11 @@ def _send_verification_email(request, customer: Customer):
         f"Nhấn vào liên kết dưới đây để xác nhận email:\n{confirm_url}\n\n"
         f"Liên kết có hiệu lực trong 3 ngày."
     )
-    send_mail(subject, message, None, [customer.email], fail_silently=False)
+    enqueue(subject, message, [customer.email])
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def customer_register(request):
+async def customer_register(request):
     body = _json_body(request)
 
     user_name = (body.get("user_name") or "").strip()
@@ -57,9 +61,10 @@ def customer_register(request):
     if not email:
         return JsonResponse({"detail": "email is required"}, status=400)
 
-    if Customer.objects.filter(user_name__iexact=user_name).exists():
+    conflict = await aidentity_conflict(user_name, email)
+    if conflict == "user_name":
         return JsonResponse({"detail": "user_name already exists"}, status=400)
-    if Customer.objects.filter(email__iexact=email).exists():
+    if conflict == "email":
         return JsonResponse({"detail": "email already in use"}, status=400)
 
     obj = Customer(
@@ -71,11 +76,11 @@ def customer_register(request):
         street=street, city=city, state=state, zip_code=zip_code,
         is_email_verified=False,
     )
-    obj.set_password(password)
-    obj.save()
+    obj.password = await amake_password(password, "customer")
+    await obj.asave()
 
     if obj.email:
-        _send_verification_email(request, obj)
+        await sync_to_async(_send_verification_email)(request, obj)
 
     return JsonResponse({
         "customer_id": obj.customer_id,
@@ -115,6 +120,7 @@ def customer_confirm_email(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limited("customer-resend-confirmation")
 def customer_resend_confirmation(request):
     body = _json_body(request)
     user_name = (body.get("user_name") or "").strip()
@@ -125,9 +131,9 @@ def customer_resend_confirmation(request):
 
     try:
         if user_name:
-            obj = Customer.objects.get(user_name__iexact=user_name)
+            obj = by_user_name(user_name).get()
         else:
-            obj = Customer.objects.get(email__iexact=email)
+            obj = by_email(email).get()
     except Customer.DoesNotExist:
         return JsonResponse({"detail": "If the account exists, an email has been sent."})
 
@@ -5,6 +5,10 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import Q
+from asgiref.sync import sync_to_async
+from repository.customer_repository import aidentity_conflict, identity_conflict
+from repository.pagination import page_with_total
+from repository.password_hashing import amake_password
 from .models import Customer
 
 # ===== Helpers =====
@@ -51,81 +55,86 @@ def _sanitize_update(body: Mapping[str, str]) -> dict:
     return out
 
 # ================== LIST + CREATE ==================
+def _list_customers(request):
+    """GET (list/search); sync ORM, run via sync_to_async from the async view."""
+    qs = Customer.objects.all()
+
+    # search: q (username, name, email, phone)
+    q = (request.GET.get("q") or "").strip()
+    if q:
+        qs = qs.filter(
+            Q(user_name__icontains=q)
+            | Q(first_name__icontains=q)
+            | Q(last_name__icontains=q)
+            | Q(email__icontains=q)
+            | Q(phone__icontains=q)
+        )
+
+    # filter chi tiết
+    username = (request.GET.get("username") or "").strip()
+    if username:
+        qs = qs.filter(user_name__icontains=username)
+
+    email = (request.GET.get("email") or "").strip()
+    if email:
+        qs = qs.filter(email__icontains=email)
+
+    phone = (request.GET.get("phone") or "").strip()
+    if phone:
+        qs = qs.filter(phone__icontains=phone)
+
+    # ordering
+    order_by_key = (request.GET.get("order_by") or "id").strip().lstrip("+").lower()
+    direction = (request.GET.get("order") or "desc").strip().lower()  # asc|desc
+    order_field = _FIELD_MAP.get(order_by_key, "customer_id")
+    if direction == "desc":
+        order_field = "-" + order_field
+    qs = qs.order_by(order_field)
+
+    qs = qs.values(
+        "customer_id",
+        "user_name",
+        "first_name", "last_name",
+        "email", "phone",
+        "street", "city", "state", "zip_code",
+    )
+
+    # pagination (page/page_size ưu tiên; fallback offset/limit)
+    # trang + total trong một câu lệnh (COUNT(*) OVER ())
+    page = request.GET.get("page")
+    page_size = request.GET.get("page_size")
+    if page or page_size:
+        page = _to_int(page, default=1, min_val=1)
+        page_size = _to_int(page_size, default=20, min_val=1, max_val=100)
+        offset = (page - 1) * page_size
+        items, total = page_with_total(qs, offset, page_size)
+    else:
+        offset = _to_int(request.GET.get("offset"), default=0, min_val=0)
+        limit = _to_int(request.GET.get("limit"), default=0, min_val=0, max_val=100)
+        if limit > 0:
+            items, total = page_with_total(qs, offset, limit)
+        else:
+            items = list(qs)
+            total = len(items)
+        page_size = limit if limit > 0 else total or 1
+        page = (offset // page_size) + 1 if page_size else 1
+
+    return JsonResponse({
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "order_by": order_by_key,
+        "order": direction if direction in ("asc", "desc") else "desc",
+    })
+
 # @_staff_required               # bật khi cần bảo vệ bằng session admin
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
-def customer_admin_list(request):
+async def customer_admin_list(request):
     # -------- GET (list/search) --------
     if request.method == "GET":
-        qs = Customer.objects.all()
-
-        # search: q (username, name, email, phone)
-        q = (request.GET.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(user_name__icontains=q)
-                | Q(first_name__icontains=q)
-                | Q(last_name__icontains=q)
-                | Q(email__icontains=q)
-                | Q(phone__icontains=q)
-            )
-
-        # filter chi tiết
-        username = (request.GET.get("username") or "").strip()
-        if username:
-            qs = qs.filter(user_name__icontains=username)
-
-        email = (request.GET.get("email") or "").strip()
-        if email:
-            qs = qs.filter(email__icontains=email)
-
-        phone = (request.GET.get("phone") or "").strip()
-        if phone:
-            qs = qs.filter(phone__icontains=phone)
-
-        # ordering
-        order_by_key = (request.GET.get("order_by") or "id").strip().lstrip("+").lower()
-        direction = (request.GET.get("order") or "desc").strip().lower()  # asc|desc
-        order_field = _FIELD_MAP.get(order_by_key, "customer_id")
-        if direction == "desc":
-            order_field = "-" + order_field
-        qs = qs.order_by(order_field)
-
-        # pagination (page/page_size ưu tiên; fallback offset/limit)
-        page = request.GET.get("page")
-        page_size = request.GET.get("page_size")
-        if page or page_size:
-            page = _to_int(page, default=1, min_val=1)
-            page_size = _to_int(page_size, default=20, min_val=1, max_val=100)
-            total = qs.count()
-            offset = (page - 1) * page_size
-            qs = qs[offset : offset + page_size]
-        else:
-            offset = _to_int(request.GET.get("offset"), default=0, min_val=0)
-            limit = _to_int(request.GET.get("limit"), default=0, min_val=0, max_val=100)
-            total = qs.count()
-            if limit > 0:
-                qs = qs[offset : offset + limit]
-            page_size = limit if limit > 0 else total or 1
-            page = (offset // page_size) + 1 if page_size else 1
-
-        items = list(
-            qs.values(
-                "customer_id",
-                "user_name",
-                "first_name", "last_name",
-                "email", "phone",
-                "street", "city", "state", "zip_code",
-            )
-        )
-        return JsonResponse({
-            "items": items,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "order_by": order_by_key,
-            "order": direction if direction in ("asc", "desc") else "desc",
-        })
+        return await sync_to_async(_list_customers)(request)
 
     body = _json_body(request)
     user_name = (body.get("user_name") or "").strip()
@@ -143,9 +152,10 @@ def customer_admin_list(request):
         return JsonResponse({"detail": "user_name is required"}, status=400)
     if not password:
         return JsonResponse({"detail": "password is required"}, status=400)
-    if Customer.objects.filter(user_name__iexact=user_name).exists():
+    conflict = await aidentity_conflict(user_name, email)
+    if conflict == "user_name":
         return JsonResponse({"detail": "user_name already exists"}, status=400)
-    if Customer.objects.filter(email__iexact=email).exists():
+    if conflict == "email":
         return JsonResponse({"detail": "email already exists"}, status=400)
 
     obj = Customer(
@@ -156,8 +166,8 @@ def customer_admin_list(request):
         phone=phone,
         street=street, city=city, state=state, zip_code=zip_code,
     )
-    obj.set_password(password)    # hash an toàn
-    obj.save()
+    obj.password = await amake_password(password, "customer")    # hash an toàn, trong process pool
+    await obj.asave()
 
     return JsonResponse({
         "customer_id": obj.customer_id,
@@ -194,7 +204,7 @@ def customer_admin_detail(request, id: int):
             new_username = (data["user_name"] or "").strip()
             if not new_username:
                 return JsonResponse({"detail": "user_name cannot be empty"}, status=400)
-            if Customer.objects.exclude(pk=obj.pk).filter(user_name__iexact=new_username).exists():
+            if identity_conflict(new_username, None, exclude_pk=obj.pk):
                 return JsonResponse({"detail": "user_name already exists"}, status=400)
             obj.user_name = new_username
 
@@ -202,8 +212,8 @@ def customer_admin_detail(request, id: int):
             raw = (data["password"] or "").strip()
             if not raw:
                 return JsonResponse({"detail": "password cannot be empty"}, status=400)
-            if not obj.check_password(raw):
-                obj.set_password(raw)
+            obj.set_password(raw)
+            obj.revoke_tokens()
 
         for k in ["first_name", "last_name", "email", "phone", "street", "city", "state", "zip_code"]:
             if k in data:
@@ -5,7 +5,13 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core import signing
-from .models import Customer, RevokedAuthToken
+from repository.auth_cache import cached_token, forget_token, remember_token
+from repository.customer_repository import by_user_name
+from repository.password_hashing import acheck_password, rehash_in_background
+from repository.password_policy import needs_rehash
+from repository.revoked_tokens import is_revoked, revoke
+from api.rate_limit import rate_limited
+from .models import Customer
 
 AUTH_SALT = "customer-auth-token"
 AUTH_MAX_AGE = 60 * 60 * 24 * 7  # 7 ngày
@@ -16,8 +22,16 @@ def _json_body(request):
     except json.JSONDecodeError:
         return {}
 
-def _issue_token(customer_id: int) -> str:
-    return signing.dumps({"id": customer_id, "iat": int(time.time())}, salt=AUTH_SALT)
+def _issue_token(customer: Customer) -> str:
+    return signing.dumps(
+        {"id": customer.pk, "iat": int(time.time()), "v": customer.token_version},
+        salt=AUTH_SALT,
+    )
+
+def _current_version(data: dict, customer: Customer) -> bool:
+    # tokens from before token_version existed carry no "v": generation 0
+    return data.get("v", 0) == customer.token_version
+
 def _get_bearer_token(request) -> str | None:
     auth = request.META.get("HTTP_AUTHORIZATION", "")
     if not auth.lower().startswith("bearer "):
@@ -33,12 +47,23 @@ def _customer_from_token(request):
         return None, JsonResponse({"detail": "Missing Bearer token"}, status=401)
 
     fp = _token_fingerprint(token)
-    if RevokedAuthToken.objects.filter(fingerprint=fp, expires_at__gt=timezone.now()).exists():
+    if is_revoked(fp):
         return None, JsonResponse({"detail": "Token revoked"}, status=401)
 
+    cached = cached_token(fp)
+    if cached is not None:
+        data, obj = cached
+        if not _current_version(data, obj):
+            return None, JsonResponse({"detail": "Token revoked"}, status=401)
+        return obj, None
+
     try:
         data = signing.loads(token, salt=AUTH_SALT, max_age=AUTH_MAX_AGE)
         obj = Customer.objects.get(pk=data.get("id"))
+        if isinstance(data.get("iat"), int):
+            remember_token(fp, data, obj, data["iat"] + AUTH_MAX_AGE)
+        if not _current_version(data, obj):
+            return None, JsonResponse({"detail": "Token revoked"}, status=401)
         return obj, None
     except signing.SignatureExpired:
         return None, JsonResponse({"detail": "Token expired"}, status=401)
@@ -47,7 +72,8 @@ def _customer_from_token(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def customer_login(request):
+@rate_limited("customer-login", account_fields=("user_name",))
+async def customer_login(request):
     """
     Body JSON: {"user_name": "...", "password": "..."}
     Trả về: token + thông tin customer (không bao gồm password)
@@ -60,17 +86,20 @@ def customer_login(request):
         return JsonResponse({"detail": "user_name and password are required"}, status=400)
 
     try:
-        obj = Customer.objects.get(user_name__iexact=user_name)
+        obj = await by_user_name(user_name).aget()
     except Customer.DoesNotExist:
         return JsonResponse({"detail": "Invalid credentials"}, status=401)
 
-    if not obj.check_password(password):
+    # PBKDF2 runs in the hashing pool, not on the event loop
+    if not await acheck_password(password, obj.password):
         return JsonResponse({"detail": "Invalid credentials"}, status=401)
+    if needs_rehash("customer", obj.password):
+        rehash_in_background(Customer, obj.pk, obj.password, password, "customer")
 
     if hasattr(obj, "is_email_verified") and not obj.is_email_verified:
         return JsonResponse({"detail": "Email not verified"}, status=403)
 
-    token = _issue_token(obj.pk)
+    token = _issue_token(obj)
     return JsonResponse({
         "token": token,
         "token_expires_in": AUTH_MAX_AGE,
@@ -125,9 +154,21 @@ def customer_logout(request):
         return JsonResponse({"detail": "Logged out"}, status=200)
 
     fp = _token_fingerprint(token)
-    RevokedAuthToken.objects.get_or_create(
-        fingerprint=fp,
-        defaults={"expires_at": expires_at},
-    )
+    revoke(fp, expires_at)
+    forget_token(fp)
     return JsonResponse({"detail": "Logged out"}, status=200)
 
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def customer_logout_all(request):
+    """
+    Đăng xuất mọi thiết bị: tăng token_version, mọi token đã cấp hết hiệu lực.
+    Header: Authorization: Bearer <token>
+    """
+    obj, error = _customer_from_token(request)
+    if error:
+        return error
+    obj.revoke_tokens()
+    obj.save(update_fields=["token_version"])
+    return JsonResponse({"detail": "Logged out from all devices"}, status=200)
@@ -4,6 +4,9 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core import signing
 from django.urls import reverse
+from repository.customer_repository import by_email, by_user_name
+from repository.email_outbox import enqueue
+from api.rate_limit import rate_limited
 from .models import Customer
 
 PWRESET_SALT = "customer-password-reset"
@@ -20,7 +23,6 @@ def _build_reset_url(request, token: str) -> str:
     return request.build_absolute_uri(f"{path}?token={token}")
 
 def _send_reset_email(request, customer: Customer):
-    from django.core.mail import send_mail
     subject = "Đặt lại mật khẩu của bạn"
     token = signing.dumps({"id": customer.pk, "email": (customer.email or "").lower(), "ts": int(time.time())},
                           salt=PWRESET_SALT)
@@ -31,10 +33,11 @@ def _send_reset_email(request, customer: Customer):
         f"(hiệu lực trong 1 giờ):\n{url}\n\n"
         f"Nếu bạn không yêu cầu, hãy bỏ qua email này."
     )
-    send_mail(subject, message, None, [customer.email], fail_silently=False)
+    enqueue(subject, message, [customer.email])
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@rate_limited("customer-password-reset")
 def password_reset_request(request):
     body = _json_body(request)
     user_name = (body.get("user_name") or "").strip()
@@ -42,9 +45,9 @@ def password_reset_request(request):
 
     try:
         if user_name:
-            obj = Customer.objects.get(user_name__iexact=user_name)
+            obj = by_user_name(user_name).get()
         elif email:
-            obj = Customer.objects.get(email__iexact=email)
+            obj = by_email(email).get()
         else:
             return JsonResponse({"detail": "user_name hoặc email là bắt buộc"}, status=400)
 
@@ -87,6 +90,7 @@ def password_reset_confirm(request):
         return JsonResponse({"detail": "invalid token"}, status=400)
 
     obj.set_password(new_password)
-    obj.save(update_fields=["password"])
+    obj.revoke_tokens()   # phiên đăng nhập cũ hết hiệu lực
+    obj.save(update_fields=["password", "token_version"])
 
     return JsonResponse({"detail": "Password updated successfully"})
@@ -0,0 +1,75 @@
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from repository.catalog_cache import versioned_key
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+def _normalized_query(request) -> str:
+    # sort by key only: for repeated keys the last value wins, so keep their order
+    return urlencode(sorted(request.GET.lists()), doseq=True)
+
+def _not_modified(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
+def _respond(request, etag: str, content: bytes, content_type: str):
+    if _not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+def catalog_cached(view):
+    """
+    Cache GET responses of catalog views under path + normalized query and the
+    catalog version (bumped by Product/Brand/Category writes). The ETag is a
+    hash of the cached body, so a revalidating client gets a 304 straight from
+    the cache without touching the database.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+
+        key = versioned_key("response", f"{request.path}?{_normalized_query(request)}")
+        entry = cache.get(key)
+        if entry is not None:
+            return _respond(request, *entry)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        content = response.content
+        etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+        entry = (etag, content, response["Content-Type"])
+        cache.set(key, entry, RESPONSE_CACHE_TIMEOUT)
+        return _respond(request, *entry)
+
+    return wrapper
+
+def watermark_response(request, watermark, build):
+    """
+    Conditional GET driven by a table watermark (MAX(updated_at), COUNT(*)):
+    ETag and Last-Modified come from the watermark, so a 304 is answered
+    before ``build`` renders the body.
+    """
+    last_modified = int(watermark.last_modified.timestamp()) if watermark.last_modified else None
+    response = get_conditional_response(request, etag=watermark.etag, last_modified=last_modified)
+    if response is None:
+        response = build()
+    response["ETag"] = watermark.etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.product'
-    label = 'product'
\ No newline at end of file
+    label = 'product'
+
+    def ready(self):
+        from . import signals  # noqa: F401
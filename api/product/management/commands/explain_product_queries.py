@@ -0,0 +1,71 @@
+from itertools import product as combinations
+from django.core.management.base import BaseCommand, CommandError
+from api.product.models import Product
+from repository.product_repository import explain_list_products
+
+TABLE = Product._meta.db_table
+
+# filter sets list_products commonly receives (values only matter for the plan shape)
+FILTERS = {
+    "none": {},
+    "brand": {"brand_id": "1"},
+    "category": {"category_id": "1"},
+    "brand+category": {"brand_id": "1", "category_id": "1"},
+    "price": {"min_price": "100", "max_price": "500"},
+    "year": {"min_year": "2018", "max_year": "2020"},
+}
+ORDERS = ["id", "name", "price", "year"]
+
+# combinations no index can serve without a sort; reported but never fail the run
+ACCEPTED = {
+    ("brand", "name"), ("category", "name"), ("brand+category", "name"),
+    ("price", "id"), ("price", "name"), ("price", "year"),
+    ("year", "id"), ("year", "name"), ("year", "price"),
+}
+
+
+def plan_issues(plan: str, filtered: bool) -> list[str]:
+    issues = []
+    for line in plan.splitlines():
+        if "USE TEMP B-TREE" in line:
+            issues.append("temp b-tree sort")
+        elif filtered and f"SCAN {TABLE}" in line and "INDEX" not in line:
+            issues.append("full table scan")
+    return issues
+
+
+def audit():
+    """Yield (filter name, order_by, direction, statement, issues, plan) for the whole matrix."""
+    for (fname, filters), order_by, direction in combinations(FILTERS.items(), ORDERS, ("asc", "desc")):
+        params = {**filters, "order_by": order_by, "order": direction, "limit": "20"}
+        for statement, plan in explain_list_products(params).items():
+            yield fname, order_by, direction, statement, plan_issues(plan, bool(filters)), plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN over list_products filter/sort combinations and "
+        "flag full scans and temp-B-tree sorts. Fails when an unaccepted combination regresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plans", action="store_true", help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        failures = 0
+        for fname, order_by, direction, statement, issues, plan in audit():
+            label = f"{fname:<15} order_by={order_by:<5} {direction:<4} {statement}"
+            if not issues:
+                self.stdout.write(f"ok       {label}")
+            elif (fname, order_by) in ACCEPTED:
+                self.stdout.write(self.style.WARNING(f"accepted {label} {', '.join(issues)}"))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"REGRESS  {label} {', '.join(issues)}"))
+            if options["plans"] or (issues and (fname, order_by) not in ACCEPTED):
+                for line in plan.splitlines():
+                    self.stdout.write(f"           {line}")
+
+        if failures:
+            raise CommandError(f"{failures} list_products query plan(s) need an index")
+        self.stdout.write(self.style.SUCCESS("All list_products query plans use indexes."))
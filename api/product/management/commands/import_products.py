@@ -0,0 +1,191 @@
+import csv
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from api.brand.models import Brand
+from api.category.models import Category
+from api.product.models import Product
+from repository import product_search
+from repository.catalog_cache import bump_catalog_version
+
+
+def _read_csv(fh):
+    yield from csv.DictReader(fh)
+
+
+def _read_ndjson(fh):
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _clean(raw: dict) -> dict:
+    """Validated row or ValueError. Accepts brand/brand_name and category/category_name."""
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    name = (raw.get("product_name") or "").strip()
+    if not name or len(name) > 255:
+        raise ValueError("product_name is required (max 255 chars)")
+    try:
+        year = int(raw.get("model_year"))
+        price = Decimal(str(raw.get("list_price"))).quantize(Decimal("0.01"))
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError("model_year and list_price must be numbers")
+    if not 1900 <= year <= 2100:
+        raise ValueError("model_year must be between 1900 and 2100")
+    if price < 0 or price >= Decimal("100000000"):
+        raise ValueError("list_price out of range")
+    brand = (raw.get("brand_name") or raw.get("brand") or "").strip() or None
+    category = (raw.get("category_name") or raw.get("category") or "").strip() or None
+    return {"product_name": name, "model_year": year, "list_price": price,
+            "brand": brand, "category": category}
+
+
+class _NameMap:
+    """name (case-insensitive) -> id for brands or categories, creating missing ones in bulk."""
+
+    def __init__(self, model, field: str, max_length: int):
+        self.model, self.field, self.max_length = model, field, max_length
+        self.ids = {}
+        for pk, name in model.objects.order_by("-pk").values_list("pk", self.field).iterator():
+            self.ids[name.lower()] = pk   # lowest id wins for duplicate category names
+        self.created = 0
+
+    def resolve(self, names: set) -> None:
+        missing = {}
+        for name in names:
+            if name.lower() not in self.ids:
+                missing.setdefault(name.lower(), name[: self.max_length])
+        if not missing:
+            return
+        self.model.objects.bulk_create(
+            [self.model(**{self.field: n}) for n in missing.values()], ignore_conflicts=True,
+        )
+        created = self.model.objects.filter(**{f"{self.field}__in": list(missing.values())})
+        if self.model is Category:
+            created = created.filter(parent__isnull=True)   # new names are created as roots
+        for pk, name in created.values_list("pk", self.field):
+            self.ids.setdefault(name.lower(), pk)
+        self.created += len(missing)
+        if self.model is Category:
+            # bulk_create skips Category.save(): give the new root categories their path
+            Category.objects.filter(path="").update(
+                path=Concat(Value("/"), Cast("category_id", CharField()), Value("/"))
+            )
+
+    def get(self, name):
+        return self.ids[name.lower()] if name else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from CSV or NDJSON and upsert them by (product_name, brand, model_year) "
+        "in transactional batches. Columns: product_name, brand_name, category_name, model_year, list_price."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Default: from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        batch_size = max(1, options["batch_size"])
+
+        fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            rows = _read_ndjson(fh) if fmt == "ndjson" else _read_csv(fh)
+            stats = self._import(rows, batch_size)
+        except (OSError, csv.Error, json.JSONDecodeError) as e:
+            raise CommandError(f"Import failed: {e}")
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+        elapsed = max(time.monotonic() - stats["started"], 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['read']} rows in {elapsed:.1f}s ({stats['read'] / elapsed:.0f} rows/s): "
+            f"{stats['created']} created, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+            f"{stats['skipped']} skipped; {stats['brands']} brands and {stats['categories']} categories created."
+        ))
+
+    def _import(self, rows, batch_size: int) -> dict:
+        brands = _NameMap(Brand, "brand_name", Brand._meta.get_field("brand_name").max_length)
+        categories = _NameMap(Category, "category_name", Category._meta.get_field("category_name").max_length)
+        stats = {"read": 0, "created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "started": time.monotonic()}
+
+        line = 1
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            cleaned = []
+            for raw in chunk:
+                line += 1
+                try:
+                    cleaned.append(_clean(raw))
+                except ValueError as e:
+                    stats["skipped"] += 1
+                    if stats["skipped"] <= 20:
+                        self.stderr.write(f"row {line}: {e}")
+            stats["read"] += len(chunk)
+            with transaction.atomic():
+                self._write_batch(cleaned, brands, categories, stats)
+
+            elapsed = max(time.monotonic() - stats["started"], 1e-9)
+            self.stdout.write(f"{stats['read']} rows ({stats['read'] / elapsed:.0f} rows/s)")
+
+        stats["brands"], stats["categories"] = brands.created, categories.created
+        return stats
+
+    def _write_batch(self, cleaned, brands, categories, stats):
+        names_before = brands.created + categories.created
+        brands.resolve({r["brand"] for r in cleaned if r["brand"]})
+        categories.resolve({r["category"] for r in cleaned if r["category"]})
+
+        incoming = {}   # natural key -> row; the last occurrence in a batch wins
+        for r in cleaned:
+            brand_id = brands.get(r["brand"])
+            incoming[(r["product_name"], brand_id, r["model_year"])] = {
+                **r, "brand_id": brand_id, "category_id": categories.get(r["category"]),
+            }
+
+        existing = {
+            (name, brand_id, year): (pk, category_id, price)
+            for pk, name, brand_id, year, category_id, price in Product.objects.filter(
+                product_name__in={k[0] for k in incoming}
+            ).values_list("product_id", "product_name", "brand_id", "model_year", "category_id", "list_price")
+        }
+
+        to_create, to_update = [], []
+        for key, r in incoming.items():
+            found = existing.get(key)
+            if found is None:
+                to_create.append(Product(
+                    product_name=r["product_name"], brand_id=r["brand_id"], category_id=r["category_id"],
+                    model_year=r["model_year"], list_price=r["list_price"],
+                ))
+            elif (found[1], found[2]) != (r["category_id"], r["list_price"]):
+                to_update.append(Product(product_id=found[0], category_id=r["category_id"], list_price=r["list_price"]))
+            else:
+                stats["unchanged"] += 1
+
+        created = Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, ["category", "list_price"])
+        stats["created"] += len(created)
+        stats["updated"] += len(to_update)
+
+        # bulk writes bypass the model signals: keep the search index and caches in step
+        product_search.index_products([p.pk for p in created if p.pk] + [p.pk for p in to_update])
+        if created or to_update or brands.created + categories.created > names_before:
+            # per committed batch, so a later failure can't leave written rows
+            # behind stale caches; the shared version reaches running servers too
+            transaction.on_commit(bump_catalog_version)
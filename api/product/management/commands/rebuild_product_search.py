@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import DatabaseError
+from repository import product_search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 product search index from products, brands and categories."
+
+    def handle(self, *args, **options):
+        try:
+            total = product_search.rebuild()
+        except DatabaseError as e:
+            raise CommandError(f"Could not rebuild product search index: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products."))
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    Product = apps.get_model("product", "Product")
+    Brand = apps.get_model("brand", "Brand")
+    Category = apps.get_model("category", "Category")
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+            "product_name, brand_name, category_name, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5: list_products falls back to LIKE scans
+        return
+    schema_editor.execute(
+        "INSERT INTO product_search(rowid, product_name, brand_name, category_name) "
+        "SELECT p.product_id, p.product_name, COALESCE(b.brand_name, ''), COALESCE(c.category_name, '') "
+        f"FROM {Product._meta.db_table} p "
+        f"LEFT JOIN {Brand._meta.db_table} b ON b.brand_id = p.brand_id "
+        f"LEFT JOIN {Category._meta.db_table} c ON c.category_id = p.category_id"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brand', '0001_initial'),
+        ('category', '0001_initial'),
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
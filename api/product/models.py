@@ -36,6 +36,13 @@ class Product(models.Model):
             models.Index(fields=["product_name"]),
             models.Index(fields=["brand_id"]),
             models.Index(fields=["category"]),
+            # filter + sort combinations of list_products (see explain_product_queries)
+            models.Index(fields=["brand", "list_price"]),
+            models.Index(fields=["brand", "model_year"]),
+            models.Index(fields=["category", "list_price"]),
+            models.Index(fields=["category", "model_year"]),
+            models.Index(fields=["list_price"]),
+            models.Index(fields=["model_year"]),
         ]
 
     def __str__(self):
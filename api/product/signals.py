@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.brand.models import Brand
+from api.category.models import Category
+from repository import product_columns, product_search
+from repository.brand_repository import invalidate_brands
+from repository.catalog_cache import bump_catalog_version
+from repository.category_repository import invalidate_categories
+from repository.taxonomy_batch import taxonomy_batch_saved
+from .models import Product
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, instance, **kwargs):
+    pk, deleted = instance.pk, kwargs.get("signal") is post_delete
+
+    def publish():
+        previous, version = bump_catalog_version()
+        if sender is Product and product_columns.loaded():
+            product_columns.product_changed(pk, previous, version, deleted)
+
+    # after commit, so no reader caches the pre-commit rows under the new version
+    transaction.on_commit(publish)
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def brand_table_changed(sender, **kwargs):
+    invalidate_brands()
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_table_changed(sender, **kwargs):
+    invalidate_categories()
+
+# ---- keep the FTS5 search index in sync ----
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    product_search.index_product(instance.pk)
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    product_search.remove_product(instance.pk)
+
+def _renamed(kwargs, field: str) -> bool:
+    update_fields = kwargs.get("update_fields")
+    return not kwargs.get("created") and (update_fields is None or field in update_fields)
+
+@receiver(post_save, sender=Brand)
+def brand_saved(sender, instance, **kwargs):
+    if _renamed(kwargs, "brand_name"):
+        product_search.index_brand(instance.pk)
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    if _renamed(kwargs, "category_name"):
+        product_search.index_category(instance.pk)
+
+@receiver(taxonomy_batch_saved, sender=Brand)
+@receiver(taxonomy_batch_saved, sender=Category)
+def taxonomy_batch_applied(sender, created, renamed, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+    if sender is Brand:
+        invalidate_brands()
+        reindex = product_search.index_brand
+    else:
+        invalidate_categories()
+        reindex = product_search.index_category
+    for pk in renamed:
+        reindex(pk)
@@ -1,3 +1,372 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from api.brand.models import Brand
+from api.category.models import Category
+from api.product.models import Product
+from api.product.management.commands.explain_product_queries import ACCEPTED, audit
+from repository import product_columns, product_search
+from repository.catalog_cache import CATALOG_CACHE, CATALOG_VERSION_KEY, bump_catalog_version, catalog_version
+from repository.product_repository import _filter_signature, get_products, list_products
 
-# Create your tests here.
+
+class ProductQueryPlanTests(TestCase):
+    def test_list_products_plans_use_indexes(self):
+        regressions = [
+            f"{fname} order_by={order_by} {direction} {statement}: {', '.join(issues)}\n{plan}"
+            for fname, order_by, direction, statement, issues, plan in audit()
+            if issues and (fname, order_by) not in ACCEPTED
+        ]
+        self.assertEqual(regressions, [], "\n\n".join(regressions))
+
+
+class ColumnarEngineParityTests(TestCase):
+    """The columnar engine must list exactly what the DB path lists."""
+
+    ORDERS = ('id', 'name', 'price', 'year', 'brand', 'brand_id', 'category', 'category_id')
+
+    @classmethod
+    def setUpTestData(cls):
+        bikes = Category.objects.create(category_name="Bikes")
+        road = Category.objects.create(category_name="Road", parent=bikes)
+        kids = Category.objects.create(category_name="Kids", parent=road)
+        shoes = Category.objects.create(category_name="Shoes")
+        trek = Brand.objects.create(brand_name="Trek")
+        zeta = Brand.objects.create(brand_name="Zeta")
+        cls.bikes, cls.road, cls.kids = bikes, road, kids
+        rows = [
+            ("Road Racer", trek, road, 2019, "1200.50"),
+            ("road racer", zeta, kids, 2021, "99.99"),
+            ("Trail Runner", None, shoes, 2020, "120.00"),
+            ("Gravel Roadster", trek, None, 2018, "1200.50"),
+            ("Éclair Kids", zeta, kids, 2021, "349.00"),
+            ("City Bike", None, bikes, 2017, "500.00"),
+            ("Mountain Road", trek, shoes, 2022, "2999.99"),
+        ]
+        for name, brand, category, year, price in rows:
+            Product.objects.create(
+                product_name=name, brand=brand, category=category,
+                model_year=year, list_price=Decimal(price),
+            )
+
+    def setUp(self):
+        product_columns._snapshot = None
+
+    def _ids(self, engine, params):
+        with override_settings(PRODUCT_LIST_ENGINE=engine):
+            data = list_products(params)
+        return [item["product_id"] for item in data["items"]], data["pagination"]["total"]
+
+    def _filters(self):
+        return [
+            {},
+            {"q": "road"},
+            {"q": "trek"},
+            {"name": "ROAD"},
+            {"name": "éclair"},
+            {"category_id": str(self.bikes.pk)},
+            {"category_id": f"{self.road.pk},{self.kids.pk}"},
+            {"min_price": "120", "max_price": "1200.50"},
+            {"min_price": "99.995"},
+            {"min_year": "2019", "max_year": "2021"},
+            {"name": "road", "category_id": str(self.bikes.pk), "max_price": "2000"},
+        ]
+
+    def test_columnar_matches_db(self):
+        for filters in self._filters():
+            for order_by in self.ORDERS:
+                for order in ("asc", "desc"):
+                    params = {**filters, "order_by": order_by, "order": order, "limit": "100"}
+                    with self.subTest(**params):
+                        self.assertEqual(self._ids("columnar", params), self._ids("db", params))
+
+    def test_search_is_answered_by_the_db(self):
+        snap = product_columns.CatalogSnapshot.load(0)
+        self.assertIsNone(snap.select({"q": "road"}, "list_price", False))
+        self.assertIsNotNone(snap.select({"q": "  "}, "list_price", False))
+
+    def test_patched_snapshot_matches_a_fresh_load(self):
+        snap = product_columns.CatalogSnapshot.load(0)
+        changes = [
+            Product.objects.create(product_name="Aardvark Road", brand=None, category=self.kids,
+                                   model_year=2020, list_price=Decimal("10.00")),
+            Product.objects.create(product_name="Zephyr", brand=None, category=None,
+                                   model_year=2023, list_price=Decimal("10.00")),
+        ]
+        moved = Product.objects.order_by("product_id").first()
+        moved.product_name, moved.list_price = "Middle Road", Decimal("777.00")
+        moved.save()
+        changes.append(moved)
+        gone = Product.objects.order_by("-product_id")[2]
+        for product in changes:
+            row = Product.objects.filter(pk=product.pk).values_list(*product_columns._COLUMNS).first()
+            snap = snap.patched(product.pk, row, snap.version + 1)
+        gone_pk = gone.pk
+        gone.delete()
+        snap = snap.patched(gone_pk, None, snap.version + 1)
+
+        fresh = product_columns.CatalogSnapshot.load(snap.version)
+        for filters in self._filters():
+            if filters.get("q"):
+                continue
+            for field in fresh.sort_keys:
+                for descending in (False, True):
+                    with self.subTest(field=field, descending=descending, **filters):
+                        self.assertEqual(
+                            fresh.values(fresh.select(filters, field, descending)),
+                            snap.values(snap.select(filters, field, descending)),
+                        )
+
+
+class ImportProductsTests(TestCase):
+    def _import(self, lines, **options):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False, encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        self.addCleanup(os.unlink, fh.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_products", fh.name, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def _server_version(self):
+        # a fresh connection, as the running server reads it
+        return caches.create_connection(CATALOG_CACHE).get(CATALOG_VERSION_KEY)
+
+    def test_committed_batches_are_published_when_a_later_one_fails(self):
+        before = catalog_version()
+        lines = [
+            json.dumps({"product_name": "Alpha", "brand_name": "Trek", "model_year": 2020, "list_price": "10"}),
+            "{not json",
+        ]
+        with self.assertRaises(CommandError):
+            self._import(lines, batch_size=1)
+        self.assertTrue(Product.objects.filter(product_name="Alpha").exists())
+        self.assertNotEqual(self._server_version(), before)
+
+    def test_each_batch_reaches_the_server(self):
+        before = catalog_version()
+        lines = [
+            json.dumps({"product_name": name, "model_year": 2020, "list_price": "10"})
+            for name in ("One", "Two", "Three")
+        ]
+        self._import(lines, batch_size=1)
+        self.assertEqual(self._server_version(), before + 3)
+
+    def test_non_object_lines_are_skipped(self):
+        lines = [
+            "[1, 2]",
+            '"text"',
+            json.dumps({"product_name": "Beta", "model_year": 2021, "list_price": "5.50"}),
+        ]
+        self._import(lines)
+        self.assertEqual(list(Product.objects.values_list("product_name", flat=True)), ["Beta"])
+
+
+class CatalogVersionTests(TestCase):
+    """The catalog version is shared: a bump from another process retires this one's entries."""
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(product_name="Racer", model_year=2020, list_price=Decimal("10.00"))
+
+    def test_bump_from_another_process_is_seen(self):
+        before = self.client.get("/api/product/")
+        self.assertEqual(before.status_code, 200)
+        self.assertEqual(get_products([self.product.pk])["items"][0]["list_price"], Decimal("10.00"))
+
+        # written without signals, then published the way another worker would
+        Product.objects.filter(pk=self.product.pk).update(list_price=Decimal("12.00"))
+        other = caches.create_connection(CATALOG_CACHE)
+        other.set(CATALOG_VERSION_KEY, other.get(CATALOG_VERSION_KEY) + 1, None)
+
+        after = self.client.get("/api/product/")
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json()["items"][0]["list_price"], "12.00")
+        self.assertEqual(get_products([self.product.pk])["items"][0]["list_price"], Decimal("12.00"))
+
+    def test_bumps_return_the_version_they_replaced(self):
+        current = catalog_version()
+        previous, version = bump_catalog_version()
+        self.assertEqual((previous, version), (current, current + 1))
+        self.assertEqual(catalog_version(), version)
+
+
+class ProductCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create([
+            Product(product_name=f"Bike {i}", model_year=2020, list_price=Decimal(i)) for i in range(12)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def _pagination(self, **params):
+        return list_products({"limit": "5", **params})["pagination"]
+
+    def test_exact_total_is_cached_per_filter_and_version(self):
+        first = self._pagination(count="exact")
+        self.assertEqual((first["total"], first["total_exact"], first["total_pages"]), (12, True, 3))
+
+        # rows written without a version bump don't show: the total comes from the cache
+        Product.objects.create(product_name="Bike 99", model_year=2020, list_price=1)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._pagination(count="exact")["total"], 12)
+        # equivalent filters share the entry
+        self.assertEqual(self._pagination(count="exact", name=" ")["total"], 12)
+
+        bump_catalog_version()
+        self.assertEqual(self._pagination(count="exact")["total"], 13)
+
+    def test_estimate_reuses_a_cached_exact_total(self):
+        self._pagination(count="exact")
+        with mock.patch("repository.product_repository.ESTIMATE_CAP", 3):
+            estimate = self._pagination(count="estimate")
+        self.assertEqual((estimate["total"], estimate["total_exact"], estimate["total_lower_bound"]), (12, True, None))
+
+    def test_estimate_past_the_cap_reports_only_a_lower_bound(self):
+        with mock.patch("repository.product_repository.ESTIMATE_CAP", 3):
+            estimate = self._pagination(count="estimate")
+            under_cap = self._pagination(count="estimate", name="Bike 1")   # Bike 1, 10, 11
+        self.assertEqual(
+            (estimate["total"], estimate["total_exact"], estimate["total_lower_bound"], estimate["total_pages"]),
+            (None, False, 3, None),
+        )
+        self.assertTrue(estimate["has_next"])
+        self.assertEqual((under_cap["total"], under_cap["total_exact"]), (3, True))
+
+    def test_count_none_skips_counting(self):
+        pagination = self._pagination(count="none", offset="10")
+        self.assertEqual((pagination["total"], pagination["total_pages"], pagination["has_next"]), (None, None, False))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        trek = Brand.objects.create(brand_name="Trek")
+        giant = Brand.objects.create(brand_name="Giant")
+        brands = [None, trek, giant, None, trek, giant, trek, None, None, giant, trek]
+        for i, brand in enumerate(brands):
+            Product.objects.create(
+                product_name=f"Bike {i}", brand=brand, model_year=2000 + i % 3, list_price=Decimal(i % 4),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def _expected(self, descending):
+        rows = list(Product.objects.values_list("product_id", "brand__brand_name"))
+        # NULLs first ascending, last descending; ties on product_id in the same direction
+        rows.sort(key=lambda r: (r[1] is not None, r[1] or "", r[0]), reverse=descending)
+        return [r[0] for r in rows]
+
+    def _walk(self, params, start_cursor, link):
+        pages, cursor = [], start_cursor
+        while cursor is not None:
+            data = list_products({**params, "cursor": cursor})
+            pages.append([item["product_id"] for item in data["items"]])
+            cursor = data["pagination"][link]
+        return pages
+
+    def test_pages_forward_and_back_over_a_nullable_key(self):
+        for order in ("asc", "desc"):
+            with self.subTest(order=order):
+                params = {"order_by": "brand", "order": order, "limit": "3"}
+                forward = self._walk(params, "", "next_cursor")
+                ids = [pk for page in forward for pk in page]
+                self.assertEqual(ids, self._expected(order == "desc"))
+
+                last = list_products({**params, "cursor": ""})
+                while last["pagination"]["next_cursor"]:
+                    last = list_products({**params, "cursor": last["pagination"]["next_cursor"]})
+                back = self._walk(params, last["pagination"]["prev_cursor"], "prev_cursor")
+                self.assertEqual(back[::-1] + [forward[-1]], forward)
+
+    def test_mismatched_or_forged_cursor_is_rejected(self):
+        data = list_products({"order_by": "brand", "cursor": "", "limit": "2"})
+        cursor = data["pagination"]["next_cursor"]
+        for params in (
+            {"order_by": "price", "cursor": cursor},
+            {"order_by": "brand", "order": "asc", "cursor": cursor},
+            {"order_by": "brand", "cursor": cursor[:-2] + "xx"},
+        ):
+            with self.subTest(**params):
+                response = self.client.get("/api/product/", params)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/product/", {"order_by": "brand", "cursor": cursor}).status_code, 200)
+
+
+class CatalogResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = Brand.objects.create(brand_name="Trek")
+        self.category = Category.objects.create(category_name="Road")
+        self.product = Product.objects.create(
+            product_name="Racer", brand=self.brand, category=self.category,
+            model_year=2020, list_price=Decimal("10.00"),
+        )
+
+    def test_revalidation_is_a_304_without_queries(self):
+        etag = self.client.get("/api/product/", {"limit": "5"})["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/product/", {"limit": "5"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_catalog_saves_change_the_etag(self):
+        def rename(obj, field, value):
+            setattr(obj, field, value)
+            obj.save()
+
+        edits = [
+            lambda: rename(self.product, "list_price", Decimal("11.00")),
+            lambda: rename(self.brand, "brand_name", "Trek Bikes"),
+            lambda: rename(self.category, "category_name", "Road Bikes"),
+        ]
+        etag = self.client.get("/api/product/")["ETag"]
+        for edit in edits:
+            with self.captureOnCommitCallbacks(execute=True):
+                edit()
+            response = self.client.get("/api/product/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
+        item = response.json()["items"][0]
+        self.assertEqual(
+            (item["list_price"], item["brand_name"], item["category_name"]),
+            ("11.00", "Trek Bikes", "Road Bikes"),
+        )
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = Brand.objects.create(brand_name="Trek")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                product_name="Marlin", brand=self.brand, category=None,
+                model_year=2020, list_price=Decimal("10.00"),
+            )
+
+    def _search(self, q):
+        return [item["product_id"] for item in self.client.get("/api/product/", {"q": q}).json()["items"]]
+
+    def test_saves_reach_the_search_index(self):
+        self.assertTrue(product_search.search_available())
+        self.assertEqual(self._search("marl"), [self.product.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.product_name = "Fuel EX"
+            self.product.save()
+        self.assertEqual(self._search("fuel"), [self.product.pk])
+        self.assertEqual(self._search("marl"), [])
+
+    def test_cache_key_folds_q_only_for_full_text_search(self):
+        pair = ({"q": "road-bike"}, {"q": " road bike "})
+        self.assertEqual(*map(_filter_signature, pair))
+        with mock.patch.object(product_search, "search_available", return_value=False):
+            self.assertNotEqual(*map(_filter_signature, pair))
+            self.assertEqual(_filter_signature({"q": " road "}), _filter_signature({"q": "road"}))
@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.get_all, name='product'),
-]
\ No newline at end of file
+    path('export/', views.export, name='product-export'),
+    path('<int:id>/', views.get_one, name='product-detail'),
+]
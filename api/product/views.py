@@ -1,6 +1,61 @@
-from django.http import JsonResponse
-from repository.product_repository import list_products
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+from api.http_cache import catalog_cached
+from repository.product_repository import (
+    list_products, iter_products, get_products, get_product, requested_fields,
+)
 
+@catalog_cached
 def get_all(request):
-    data = list_products(request.GET)
+    try:
+        if "ids" in request.GET:
+            ids = [int(x) for x in request.GET.get("ids", "").split(",") if x.strip().isdigit()]
+            data = get_products(ids)
+        else:
+            data = list_products(request.GET)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
     return JsonResponse(data, safe=False)
+
+@require_http_methods(["GET"])
+def get_one(request, id: int):
+    data = get_product(id)
+    if data is None:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    return JsonResponse(data)
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back instead of buffering it."""
+    def write(self, value):
+        return value
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[k] for k in fields])
+
+@require_http_methods(["GET"])
+def export(request):
+    """
+    GET /api/product/export/?format=ndjson|csv plus the list_products filters and fields.
+    """
+    fmt = (request.GET.get("format") or "ndjson").strip().lower()
+    rows = iter_products(request.GET)
+    if fmt == "ndjson":
+        response = StreamingHttpResponse(_ndjson_lines(rows), content_type="application/x-ndjson")
+        filename = "products.ndjson"
+    elif fmt == "csv":
+        response = StreamingHttpResponse(_csv_lines(rows, requested_fields(request.GET)), content_type="text/csv; charset=utf-8")
+        filename = "products.csv"
+    else:
+        return JsonResponse({"detail": "format must be ndjson or csv"}, status=400)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,5 +1,6 @@
 from django.db import models
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import check_password
+from repository.password_policy import hash_password
 
 class Staff(models.Model):
     staff_id = models.AutoField(primary_key=True)
@@ -35,12 +36,12 @@ class Staff(models.Model):
         return name or self.username
 
     def set_password(self, raw_password: str):
-        self.password = make_password(raw_password)
+        self.password = hash_password("staff", raw_password)
 
     def check_password(self, raw_password: str) -> bool:
         return check_password(raw_password, self.password)
 
     def save(self, *args, **kwargs):
         if self.password and "$" not in self.password:
-            self.password = make_password(self.password)
+            self.password = hash_password("staff", self.password)
         super().save(*args, **kwargs)
@@ -1,3 +1,40 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from api.rate_limit import buckets, rate_limited
 
-# Create your tests here.
+
+@override_settings(RATE_LIMITS={"test-route": {"ip": "5/min", "account": "2/min"}})
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        buckets.clear()
+        self.addCleanup(buckets.clear)
+        self.calls = 0
+
+    def _request(self, user_name="alice", ip="10.0.0.1"):
+        return RequestFactory().post(
+            "/login/", {"user_name": user_name}, content_type="application/json", REMOTE_ADDR=ip,
+        )
+
+    def _view(self, request):
+        self.calls += 1
+        return JsonResponse({"detail": "ok"})
+
+    def test_account_limit_rejects_before_the_view_runs(self):
+        view = rate_limited("test-route")(self._view)
+        self.assertEqual([view(self._request("Alice")).status_code for _ in range(2)], [200, 200])
+        response = view(self._request("ALICE "))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response["Retry-After"]), 30)   # one token refills in 60s / 2
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(view(self._request("bob")).status_code, 200)
+
+    def test_ip_limit_applies_to_async_views(self):
+        async def view(request):
+            return self._view(request)
+
+        view = rate_limited("test-route")(view)
+        statuses = [async_to_sync(view)(self._request(f"user{i}")).status_code for i in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(self.calls, 5)
+        self.assertEqual(async_to_sync(view)(self._request("user9", ip="10.0.0.2")).status_code, 200)
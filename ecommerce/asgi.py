@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve with an ASGI server (e.g. ``uvicorn ecommerce.asgi:application``) so the
+async customer login/register views can await password hashing in the
+process pool (repository/password_hashing.py) instead of blocking a worker.
 """
 
 import os
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -86,6 +87,69 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalog counts, facets, products and responses are cached per process in
+# "default" under the catalog version. That version lives in "catalog", which
+# every worker and management command must share: the file cache covers all
+# processes on one host, use redis when serving from several hosts.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'ecommerce-catalog-cache',
+    },
+}
+
+# "db" runs every product listing as SQL; "columnar" answers filter/sort/paginate
+# from an in-memory NumPy snapshot of the catalog (requires numpy).
+PRODUCT_LIST_ENGINE = 'db'
+
+# upper bound on operations per /api/admin/{brand,category}/batch/ request,
+# keeping the transaction (and SQLite's write lock) short
+ADMIN_BATCH_MAX_SIZE = 500
+
+# how often each worker polls revoked_tokens for logouts made in other workers;
+# also the longest a revoked token can keep working in another process
+REVOKED_TOKEN_REFRESH_SECONDS = 5
+
+# seconds between in-process purges of expired revoked tokens (None = off;
+# run `manage.py purge_revoked_tokens` from cron instead)
+REVOKED_TOKEN_PURGE_INTERVAL = None
+
+# per-process LRU of verified bearer tokens + customer snapshots. Hits are checked
+# against the customer's token_version in CACHES, so with a shared backend an
+# edit or logout-everywhere reaches every worker at once; with locmem the TTL
+# bounds how long another worker can serve a customer edited elsewhere
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# process pool the async login/register views hash passwords on
+# (None: one worker per CPU; 0: hash inline, blocking the event loop)
+PASSWORD_HASH_WORKERS = None
+
+# hasher per model: an algorithm from PASSWORD_HASHERS and its work factor
+# (PBKDF2 iterations, Argon2 time_cost, bcrypt rounds, scrypt work_factor;
+# None = Django's default). Size it with `manage.py bench_password_hashers`;
+# logins rehash older hashes to the policy in the background.
+PASSWORD_POLICIES = {
+    "customer": {"algorithm": "pbkdf2_sha256", "work_factor": None},
+    "staff": {"algorithm": "pbkdf2_sha256", "work_factor": None},
+}
+
+# per-process token buckets in front of credential endpoints, keyed by client
+# IP and by the user_name/email in the body ("N/s|min|hour|day"); a route
+# missing here is not limited
+RATE_LIMITS = {
+    "customer-login": {"ip": "30/min", "account": "10/min"},
+    "customer-password-reset": {"ip": "10/min", "account": "3/hour"},
+    "customer-resend-confirmation": {"ip": "10/min", "account": "3/hour"},
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
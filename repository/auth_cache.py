@@ -0,0 +1,121 @@
+# Process-local LRU of verified bearer tokens, keyed by token fingerprint.
+# An entry holds the decoded payload and a slim snapshot of the customer, so a
+# repeat request skips signing.loads() and the Customer lookup. Entries live
+# for AUTH_TOKEN_CACHE_TTL seconds, never past the token's own expiry, and are
+# dropped on logout and whenever the customer row is saved or deleted
+# (api/customer/signals.py).
+#
+# Other workers learn about a save through the Django cache: every hit checks
+# the customer's token_version stored there, and a save or delete removes that
+# key on commit, sending each worker back to the DB. With a shared CACHES
+# backend, logout-everywhere and password changes apply to all workers on their
+# next request. With the per-process locmem default, AUTH_TOKEN_CACHE_TTL
+# remains the bound.
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from api.customer.models import Customer
+
+# everything the authenticated views read; the password hash stays out
+SNAPSHOT_FIELDS = tuple(
+    f.attname for f in Customer._meta.concrete_fields if f.attname != 'password'
+)
+
+class _Entry(NamedTuple):
+    customer_id: int
+    payload: dict
+    values: tuple        # SNAPSHOT_FIELDS, in concrete field order
+    expires: float       # time.monotonic() deadline
+
+class TokenCache:
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_customer = {}
+
+    def get(self, fingerprint: str):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._drop(fingerprint)
+                return None
+            self._entries.move_to_end(fingerprint)
+            return entry
+
+    def put(self, fingerprint: str, entry: _Entry):
+        with self._lock:
+            self._drop(fingerprint)
+            self._entries[fingerprint] = entry
+            self._by_customer.setdefault(entry.customer_id, set()).add(fingerprint)
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+
+    def discard(self, fingerprint: str):
+        with self._lock:
+            self._drop(fingerprint)
+
+    def discard_customer(self, customer_id: int):
+        with self._lock:
+            for fingerprint in list(self._by_customer.get(customer_id, ())):
+                self._drop(fingerprint)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_customer.clear()
+
+    def _drop(self, fingerprint: str):
+        entry = self._entries.pop(fingerprint, None)
+        if entry is None:
+            return
+        owned = self._by_customer.get(entry.customer_id)
+        if owned is not None:
+            owned.discard(fingerprint)
+            if not owned:
+                del self._by_customer[entry.customer_id]
+
+_cache = TokenCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000))
+
+def _version_key(customer_id: int) -> str:
+    return f"customer:token-version:{customer_id}"
+
+def cached_token(fingerprint: str):
+    """(payload, Customer) for a token verified earlier, or None."""
+    entry = _cache.get(fingerprint)
+    if entry is None:
+        return None
+    # a fresh instance per request; fields outside the snapshot load on access
+    customer = Customer.from_db('default', SNAPSHOT_FIELDS, entry.values)
+    if cache.get(_version_key(entry.customer_id)) != customer.token_version:
+        # changed (or evicted) since this snapshot was taken: verify against the DB
+        _cache.discard(fingerprint)
+        return None
+    return entry.payload, customer
+
+def remember_token(fingerprint: str, payload: dict, customer: Customer, expires_at: float):
+    """Cache a verified token; ``expires_at`` is the token's expiry as a Unix timestamp."""
+    lifetime = min(getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60), expires_at - time.time())
+    if lifetime <= 0:
+        return
+    values = tuple(getattr(customer, name) for name in SNAPSHOT_FIELDS)
+    # add, not set: never overwrite a newer version with this (possibly older) read
+    cache.add(_version_key(customer.pk), customer.token_version, None)
+    _cache.put(fingerprint, _Entry(customer.pk, payload, values, time.monotonic() + lifetime))
+
+def forget_token(fingerprint: str):
+    _cache.discard(fingerprint)
+
+def forget_customer(customer_id: int):
+    """Drop the customer's tokens here, and in other workers once the change commits."""
+    _cache.discard_customer(customer_id)
+    transaction.on_commit(lambda: cache.delete(_version_key(customer_id)))
+
+def clear_tokens():
+    _cache.clear()
@@ -1,16 +1,41 @@
 from typing import Mapping, List, Dict
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
 from api.brand.models import Brand
+from repository.lookup_cache import LookupTable, Watermark
+from repository.taxonomy_batch import apply_batch
 
-def list_brands(params: Mapping[str, str]) -> List[Dict]:
-    qs = Brand.objects.all()
-    name = (params.get('name') or '').strip()
-    if name:
-        qs = qs.filter(brand_name__icontains=name)
+_brands = LookupTable(Brand, 'brand_name', ('brand_id', 'brand_name', 'created_at', 'updated_at'))
+
+def brand_watermark() -> Watermark:
+    return _brands.watermark()
+
+def invalidate_brands():
+    _brands.invalidate()
 
+def list_brands(params: Mapping[str, str], watermark: Watermark | None = None) -> List[Dict]:
+    name = (params.get('name') or '').strip()
     order = (params.get('order') or 'desc').lower()
-    order_field = 'brand_name'
-    if order == 'desc':
-        order_field = '-' + order_field
-    qs = qs.order_by(order_field)
+    return _brands.search(name, order == 'desc', watermark)
+
+def find_brand(name: str) -> Brand | None:
+    """Case-insensitive lookup served by the LOWER(brand_name) unique index."""
+    try:
+        return Brand.objects.alias(name_key=Lower('brand_name')).get(name_key=Lower(Value(name)))
+    except Brand.DoesNotExist:
+        return None
+
+def get_or_create_brand(name: str) -> tuple[Brand | None, bool]:
+    """
+    Insert first and let the unique index reject duplicates, so concurrent
+    creates can't both succeed and the common path is a single INSERT.
+    """
+    try:
+        with transaction.atomic():
+            return Brand.objects.create(brand_name=name), True
+    except IntegrityError:
+        return find_brand(name), False
 
-    return list(qs.values('brand_id', 'brand_name', 'created_at', 'updated_at'))
+def apply_brand_batch(operations) -> List[Dict]:
+    return apply_batch(Brand, 'brand_name', operations)
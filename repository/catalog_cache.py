@@ -0,0 +1,61 @@
+import hashlib
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import locks
+
+# Bumped after every committed Product/Brand/Category write (api/product/signals.py,
+# import_products). Every catalog-derived cache key embeds the current version,
+# so a bump invalidates all of them at once without having to track individual
+# keys. The entries may stay in each process's default cache, but the version
+# itself must be seen by every process: it lives in the "catalog" cache alias
+# (FileBasedCache by default, see settings.CACHES).
+CATALOG_CACHE = "catalog"
+CATALOG_VERSION_KEY = "catalog:version"
+# serializes bumps between processes on this host
+LOCK_PATH = Path(tempfile.gettempdir()) / "ecommerce-catalog-version.lock"
+
+def _store():
+    return caches[CATALOG_CACHE if CATALOG_CACHE in settings.CACHES else "default"]
+
+def _seed() -> int:
+    # time based so a version evicted from the cache never restarts at a value
+    # that older entries were stored under
+    return time.time_ns() // 1000
+
+@contextmanager
+def _bump_lock():
+    with open(LOCK_PATH, "a") as fh:
+        locks.lock(fh, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(fh)
+
+def catalog_version() -> int:
+    store = _store()
+    version = store.get(CATALOG_VERSION_KEY)
+    if version is None:
+        store.add(CATALOG_VERSION_KEY, _seed(), None)
+        version = store.get(CATALOG_VERSION_KEY)
+    return version
+
+def bump_catalog_version() -> tuple[int | None, int]:
+    """
+    Move to a new version and return (previous, new); previous is None if the
+    key had been lost. Read-modify-write under a lock file, so ``previous`` is
+    exactly the version this bump replaced.
+    """
+    store = _store()
+    with _bump_lock():
+        previous = store.get(CATALOG_VERSION_KEY)
+        version = previous + 1 if previous is not None else _seed()
+        store.set(CATALOG_VERSION_KEY, version, None)
+    return previous, version
+
+def versioned_key(prefix: str, signature: str) -> str:
+    digest = hashlib.sha1(signature.encode("utf-8")).hexdigest()
+    return f"catalog:{prefix}:{catalog_version()}:{digest}"
@@ -1,16 +1,88 @@
 from typing import Mapping, List, Dict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Subquery, Value
+from django.db.models.functions import Concat, Length, Lower, Substr
 from api.category.models import Category
+from repository.lookup_cache import LookupTable, Watermark
+from repository.taxonomy_batch import apply_batch
 
-def list_categories(params: Mapping[str, str]) -> List[Dict]:
-    qs = Category.objects.all()
-    name = (params.get('name') or '').strip()
-    if name:
-        qs = qs.filter(category_name__icontains=name)
+_categories = LookupTable(Category, 'category_name', ('category_id', 'category_name', 'parent_id', 'created_at', 'updated_at'))
+
+def category_watermark() -> Watermark:
+    return _categories.watermark()
+
+def invalidate_categories():
+    _categories.invalidate()
 
+def list_categories(params: Mapping[str, str], watermark: Watermark | None = None) -> List[Dict]:
+    name = (params.get('name') or '').strip()
     order = (params.get('order') or 'desc').lower()
-    order_field = 'category_name'
-    if order == 'desc':
-        order_field = '-' + order_field
-    qs = qs.order_by(order_field)
+    return _categories.search(name, order == 'desc', watermark)
+
+def find_category(name: str, parent: Category | None = None) -> Category | None:
+    """
+    Case-insensitive lookup of ``name`` among the children of ``parent`` (the
+    roots when None): the parent_id index narrows it to the siblings.
+    """
+    try:
+        return Category.objects.alias(name_key=Lower('category_name')).get(
+            parent=parent, name_key=Lower(Value(name)),
+        )
+    except Category.DoesNotExist:
+        return None
+
+def get_or_create_category(name: str, parent: Category | None = None) -> tuple[Category | None, bool]:
+    """Single INSERT guarded by the unique index; the existing sibling on conflict."""
+    try:
+        with transaction.atomic():
+            return Category.objects.create(category_name=name, parent=parent), True
+    except IntegrityError:
+        return find_category(name, parent), False
+
+def apply_category_batch(operations) -> List[Dict]:
+    return apply_batch(Category, 'category_name', operations, hierarchical=True)
+
+def subtree_ids(category_ids: List[int]) -> List[int]:
+    """
+    The given categories plus all their descendants, in one statement: each
+    root contributes an indexed range [path, path_end) on category.path.
+    """
+    cond = Q()
+    for cid in category_ids:
+        root = Category.objects.filter(pk=cid).order_by()
+        start = Subquery(root.values('path')[:1])
+        end = Subquery(root.annotate(
+            end=Concat(Substr('path', 1, Length('path') - 1), Value('0'))
+        ).values('end')[:1])
+        cond |= Q(path__gte=start, path__lt=end)
+    found = Category.objects.filter(cond).order_by().values_list('category_id', flat=True)
+    return sorted(set(category_ids) | set(found))
+
+def category_tree() -> List[Dict]:
+    """
+    Whole hierarchy as nested nodes. Own product counts come from a single
+    grouped query; subtree totals are summed up the tree in memory.
+    """
+    rows = Category.objects.annotate(product_count=Count('products')).order_by('path').values(
+        'category_id', 'category_name', 'parent_id', 'path', 'product_count',
+    )
+    nodes, roots = {}, []
+    for r in rows:
+        node = {
+            "category_id": r['category_id'],
+            "category_name": r['category_name'],
+            "parent_id": r['parent_id'],
+            "product_count": r['product_count'],
+            "total_product_count": r['product_count'],
+            "children": [],
+        }
+        nodes[r['category_id']] = node
+        parent = nodes.get(r['parent_id'])
+        (parent["children"] if parent else roots).append(node)
 
-    return list(qs.values('category_id', 'category_name', 'created_at', 'updated_at'))
+    # deepest first, so each child's total is final before it is added to its parent
+    for r in sorted(rows, key=lambda r: r['path'].count('/'), reverse=True):
+        parent = nodes.get(r['parent_id'])
+        if parent:
+            parent["total_product_count"] += nodes[r['category_id']]["total_product_count"]
+    return roots
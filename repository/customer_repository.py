@@ -0,0 +1,55 @@
+from django.db.models import BooleanField, Case, Q, QuerySet, Value, When
+from django.db.models.functions import Lower
+from api.customer.models import Customer
+
+# Case-insensitive identity lookups. LOWER(col) = LOWER(?) matches the
+# functional indexes on Customer (customer_user_name_ci_idx, customer_email_ci_idx),
+# which user_name__iexact / email__iexact (a LIKE) can't use on SQLite.
+
+def _folded():
+    return Customer.objects.alias(user_name_key=Lower('user_name'), email_key=Lower('email'))
+
+def by_user_name(user_name: str) -> QuerySet:
+    return _folded().filter(user_name_key=Lower(Value(user_name)))
+
+def by_email(email: str) -> QuerySet:
+    return _folded().filter(email_key=Lower(Value(email)))
+
+def _identity_query(user_name: str | None, email: str | None, exclude_pk) -> QuerySet | None:
+    q = Q()
+    if user_name:
+        q |= Q(user_name_key=Lower(Value(user_name)))
+    if email:
+        q |= Q(email_key=Lower(Value(email)))
+    if not q:
+        return None
+    qs = _folded().filter(q)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    # the database says which column matched; legacy rows can share an email,
+    # so a user_name match is ordered ahead of them
+    if user_name:
+        hit = Case(When(user_name_key=Lower(Value(user_name)), then=Value(True)),
+                   default=Value(False), output_field=BooleanField())
+        qs = qs.annotate(user_name_hit=hit).order_by('-user_name_hit')
+    else:
+        qs = qs.annotate(user_name_hit=Value(False, output_field=BooleanField()))
+    return qs.values_list('user_name_hit', flat=True)[:1]
+
+def _conflict(hits) -> str | None:
+    hits = list(hits)
+    if not hits:
+        return None
+    return 'user_name' if hits[0] else 'email'
+
+def identity_conflict(user_name: str | None, email: str | None, exclude_pk=None) -> str | None:
+    """
+    'user_name' or 'email' when another customer already uses it (ignoring
+    case), else None; both checks in one indexed query.
+    """
+    qs = _identity_query(user_name, email, exclude_pk)
+    return None if qs is None else _conflict(qs)
+
+async def aidentity_conflict(user_name: str | None, email: str | None, exclude_pk=None) -> str | None:
+    qs = _identity_query(user_name, email, exclude_pk)
+    return None if qs is None else _conflict([hit async for hit in qs])
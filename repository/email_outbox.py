@@ -0,0 +1,103 @@
+# Transactional outbox for customer mail. Views call enqueue(), which is a
+# single INSERT, and `manage.py send_queued_email` delivers the queue over one
+# reused mail connection (settings.EMAIL_BACKEND), retrying failures with
+# exponential backoff until MAX_ATTEMPTS.
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+from typing import NamedTuple, List
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Subquery
+from django.utils import timezone
+from api.customer.models import OutboundEmail
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30          # 30s, 1m, 2m, 4m, ... capped at MAX_BACKOFF_SECONDS
+MAX_BACKOFF_SECONDS = 60 * 60
+LEASE_SECONDS = 5 * 60        # claimed rows come back if a worker dies mid-batch
+
+class DeliveryResult(NamedTuple):
+    sent: int
+    retried: int
+    failed: int
+
+def enqueue(subject: str, message: str, recipients: List[str], from_email: str | None = None) -> OutboundEmail:
+    return OutboundEmail.objects.create(
+        subject=subject, body=message, from_email=from_email, recipients=list(recipients),
+    )
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS))
+
+def _claim(batch_size: int) -> List[OutboundEmail]:
+    """
+    Take up to ``batch_size`` due messages in one UPDATE, so two workers never
+    send the same row: the lease pushes next_attempt_at forward and the claim
+    token identifies this worker's rows.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = (OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+           .order_by("next_attempt_at").values("pk")[:batch_size])
+    OutboundEmail.objects.filter(pk__in=Subquery(due), status=OutboundEmail.PENDING, next_attempt_at__lte=now) \
+        .update(claim=token, next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+    return list(OutboundEmail.objects.filter(claim=token).order_by("pk"))
+
+def deliver_pending(batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS, connection=None) -> DeliveryResult:
+    """Send one batch of due messages; returns how many were sent, rescheduled and given up on."""
+    messages = _claim(batch_size)
+    if not messages:
+        return DeliveryResult(0, 0, 0)
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = retried = failed = 0
+
+    def record(item, error: Exception | None):
+        nonlocal sent, retried, failed
+        item.attempts += 1
+        item.claim = ""
+        if error is None:
+            item.status = OutboundEmail.SENT
+            item.sent_at = timezone.now()
+            sent += 1
+        else:
+            item.last_error = f"{type(error).__name__}: {error}"[:2000]
+            if item.attempts >= max_attempts:
+                item.status = OutboundEmail.FAILED
+                failed += 1
+            else:
+                item.next_attempt_at = timezone.now() + backoff(item.attempts)
+                retried += 1
+        item.save(update_fields=["attempts", "claim", "status", "last_error", "next_attempt_at", "sent_at"])
+
+    try:
+        connection.open()
+    except Exception as e:
+        # server unreachable: back the whole batch off instead of timing out per message
+        for item in messages:
+            record(item, e)
+        return DeliveryResult(sent, retried, failed)
+
+    try:
+        for index, item in enumerate(messages):
+            email = EmailMessage(item.subject, item.body, item.from_email, item.recipients, connection=connection)
+            try:
+                email.send()
+            except Exception as e:
+                record(item, e)
+                # replace a possibly broken session, or send() would open and
+                # close a fresh one for every remaining message
+                try:
+                    with suppress(Exception):
+                        connection.close()
+                    connection.open()
+                except Exception as e:
+                    for rest in messages[index + 1:]:
+                        record(rest, e)
+                    break
+            else:
+                record(item, None)
+    finally:
+        connection.close()
+    return DeliveryResult(sent, retried, failed)
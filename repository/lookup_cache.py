@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime
+from typing import NamedTuple, List, Dict
+from django.db.models import Count, Max
+
+class Watermark(NamedTuple):
+    last_modified: datetime | None
+    count: int
+
+    @property
+    def etag(self) -> str:
+        ts = self.last_modified.timestamp() if self.last_modified else 0
+        return f'"{self.count}-{ts:.6f}"'
+
+class LookupTable:
+    """
+    Process-local copy of a small table (brands, categories), kept sorted by
+    name in both directions. It is reloaded when the (MAX(updated_at), COUNT(*))
+    watermark moves or a write signal calls invalidate().
+    """
+
+    def __init__(self, model, name_field: str, fields: tuple):
+        self.model = model
+        self.name_field = name_field
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._state = None   # (watermark, rows ascending, rows descending)
+
+    def watermark(self) -> Watermark:
+        agg = self.model.objects.aggregate(last=Max('updated_at'), count=Count('pk'))
+        return Watermark(agg['last'], agg['count'])
+
+    def invalidate(self):
+        self._state = None
+
+    def rows(self, watermark: Watermark | None = None, descending: bool = False) -> List[Dict]:
+        if watermark is None:
+            watermark = self.watermark()
+        state = self._state
+        if state is None or state[0] != watermark:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != watermark:
+                    asc = list(self.model.objects.order_by(self.name_field, 'pk').values(*self.fields))
+                    state = (watermark, asc, asc[::-1])
+                    self._state = state
+        return state[2] if descending else state[1]
+
+    def search(self, name: str, descending: bool, watermark: Watermark | None = None) -> List[Dict]:
+        rows = self.rows(watermark, descending)
+        needle = name.lower()
+        if needle:
+            rows = [r for r in rows if needle in r[self.name_field].lower()]
+        return [dict(r) for r in rows]
@@ -0,0 +1,22 @@
+from django.db import connection
+from django.db.models import Count, Window
+
+def supports_window_total() -> bool:
+    return connection.features.supports_over_clause
+
+def page_with_total(qs, offset: int, limit: int) -> tuple[list, int]:
+    """
+    Rows ``offset .. offset + limit`` of a values() queryset plus the unsliced
+    total. Uses COUNT(*) OVER () so both come back in one statement; backends
+    without window functions (or a page past the end) fall back to count().
+    """
+    if not supports_window_total():
+        return list(qs[offset: offset + limit]), qs.count()
+
+    rows = list(qs.annotate(window_total=Window(Count('pk')))[offset: offset + limit])
+    if not rows:
+        return rows, qs.count() if offset else 0
+    total = rows[0]['window_total']
+    for row in rows:
+        del row['window_total']
+    return rows, total
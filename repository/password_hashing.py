@@ -0,0 +1,109 @@
+# Password hashing for async views. PBKDF2 is pure CPU (tens of ms per call),
+# so awaiting it on a bounded process pool keeps the event loop - and the
+# thread ASGI runs sync views on - free for cheap requests during a login
+# burst. PASSWORD_HASH_WORKERS sizes the pool (None: one per CPU); 0 hashes
+# inline on the calling thread.
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.db import close_old_connections
+from repository.password_policy import encode, hasher_spec
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pool = None
+_writer = None
+_override = None
+
+def _init_worker():
+    import django
+    django.setup()
+
+def workers() -> int:
+    if _override is not None:
+        return _override
+    configured = getattr(settings, 'PASSWORD_HASH_WORKERS', None)
+    if configured is None:
+        return os.cpu_count() or 1
+    return configured
+
+def configure(count: int | None):
+    """Replace the pool size at runtime (benchmarks); None restores the setting."""
+    global _override
+    shutdown()
+    _override = count
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: the parent has an event loop and DB connections
+            _pool = ProcessPoolExecutor(
+                max_workers=workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _pool
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+async def _run(fn, *args):
+    if workers() == 0:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(_executor(), fn, *args)
+
+async def amake_password(raw_password: str, policy: str) -> str:
+    """Hash under settings.PASSWORD_POLICIES[policy]."""
+    return await _run(encode, *hasher_spec(policy), raw_password)
+
+async def acheck_password(raw_password: str, encoded: str) -> bool:
+    return await _run(check_password, raw_password, encoded)
+
+def _writer_executor() -> ThreadPoolExecutor:
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+        return _writer
+
+def _store_rehash(model, pk, old_encoded: str, spec: tuple, raw_password: str, encoded: str | None):
+    try:
+        if encoded is None:
+            encoded = encode(*spec, raw_password)
+        # skip if the password changed while we were hashing
+        model.objects.filter(pk=pk, password=old_encoded).update(password=encoded)
+    except Exception:
+        logger.exception("rehashing %s %s failed", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+def rehash_in_background(model, pk, old_encoded: str, raw_password: str, policy: str):
+    """
+    Upgrade a just-verified hash to ``policy`` without delaying the response:
+    the hash runs in the process pool and a writer thread stores it. Doesn't
+    depend on the request's event loop, so it also works under WSGI.
+    """
+    writer = _writer_executor()
+    spec = hasher_spec(policy)
+    if workers() == 0:
+        writer.submit(_store_rehash, model, pk, old_encoded, spec, raw_password, None)
+        return
+
+    def hashed(future):
+        if future.exception() is None:
+            writer.submit(_store_rehash, model, pk, old_encoded, spec, raw_password, future.result())
+        else:
+            logger.error("rehashing %s %s failed: %s", model.__name__, pk, future.exception())
+
+    _executor().submit(encode, *spec, raw_password).add_done_callback(hashed)
@@ -0,0 +1,54 @@
+# Per-model password hashing policy (settings.PASSWORD_POLICIES): which hasher
+# from PASSWORD_HASHERS to use and its work factor. Hashes made under an older
+# policy still verify; needs_rehash() tells the login path to upgrade them.
+import copy
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+
+# the attribute each hasher reads its cost from
+WORK_FACTOR_ATTRS = {
+    "pbkdf2_sha256": "iterations",
+    "pbkdf2_sha1": "iterations",
+    "argon2": "time_cost",
+    "bcrypt_sha256": "rounds",
+    "bcrypt": "rounds",
+    "scrypt": "work_factor",
+}
+
+def make_hasher(algorithm: str = "default", work_factor: int | None = None):
+    """A hasher instance for ``algorithm`` with its cost set to ``work_factor``."""
+    hasher = get_hasher(algorithm)
+    if work_factor is None:
+        return hasher
+    attr = WORK_FACTOR_ATTRS.get(hasher.algorithm)
+    if attr is None:
+        raise ValueError(f"no work factor known for hasher {hasher.algorithm!r}")
+    hasher = copy.copy(hasher)   # get_hasher() instances are shared
+    setattr(hasher, attr, work_factor)
+    return hasher
+
+def policy(name: str) -> dict:
+    return getattr(settings, "PASSWORD_POLICIES", {}).get(name, {})
+
+def policy_hasher(name: str):
+    return make_hasher(*hasher_spec(name))
+
+def hasher_spec(name: str) -> tuple[str, int | None]:
+    """(algorithm, work_factor) of a policy, resolved here so other processes hash the same way."""
+    p = policy(name)
+    return p.get("algorithm") or "default", p.get("work_factor")
+
+def encode(algorithm: str, work_factor: int | None, raw_password: str) -> str:
+    hasher = make_hasher(algorithm, work_factor)
+    return hasher.encode(raw_password, hasher.salt())
+
+def hash_password(name: str, raw_password: str) -> str:
+    return encode(*hasher_spec(name), raw_password)
+
+def needs_rehash(name: str, encoded: str) -> bool:
+    try:
+        current = identify_hasher(encoded)
+    except ValueError:
+        return True
+    target = policy_hasher(name)
+    return current.algorithm != target.algorithm or target.must_update(encoded)
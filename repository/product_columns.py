@@ -0,0 +1,287 @@
+# In-process columnar snapshot of the catalog for list_products, enabled with
+# settings.PRODUCT_LIST_ENGINE = "columnar" when NumPy is installed. Filters are
+# boolean masks and sorts are argsorts over column arrays; the snapshot is tagged
+# with the catalog version and patched or reloaded when the catalog changes.
+import threading
+from bisect import bisect_left
+from decimal import Decimal, InvalidOperation, ROUND_CEILING, ROUND_FLOOR
+from typing import Mapping, List, Dict, Optional
+from django.conf import settings
+from api.category.models import Category
+from api.product.models import Product
+from repository.catalog_cache import catalog_version
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, the engine is simply unavailable
+    np = None
+
+_COLUMNS = (
+    'product_id', 'product_name',
+    'brand_id', 'brand__brand_name',
+    'category_id', 'category__category_name',
+    'model_year', 'list_price',
+)
+# SQLite LIKE only folds ASCII letters; match it exactly
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+_lock = threading.Lock()
+_snapshot = None
+
+def enabled() -> bool:
+    return np is not None and getattr(settings, 'PRODUCT_LIST_ENGINE', 'db') == 'columnar'
+
+def loaded() -> bool:
+    return _snapshot is not None
+
+def _csv_ints(s: str | None) -> list[int]:
+    if not s:
+        return []
+    return [int(x) for x in s.split(',') if x.strip().isdigit()]
+
+def _cents(value, rounding) -> Optional[int]:
+    try:
+        return int((Decimal(value) * 100).to_integral_value(rounding=rounding))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+# string columns sorted through integer ranks: column index in _COLUMNS
+_RANKED = {'product_name': 1, 'brand__brand_name': 3, 'category__category_name': 5}
+
+def _ranks(values: list):
+    """
+    (sorted distinct strings, ordinal rank of each value with None -> -1) so
+    text sorts become integer argsorts.
+    """
+    distinct = sorted({v for v in values if v is not None})
+    position = {v: i for i, v in enumerate(distinct)}
+    ranks = np.fromiter((-1 if v is None else position[v] for v in values), dtype=np.int64, count=len(values))
+    return distinct, ranks
+
+def _numbers(row: tuple) -> tuple:
+    """(id, brand_id, category_id, model_year, price in cents) of one row."""
+    return (
+        row[0],
+        -1 if row[2] is None else row[2],
+        -1 if row[4] is None else row[4],
+        row[6],
+        int(row[7] * 100),
+    )
+
+def _load_rows() -> list:
+    qs = Product.objects.order_by('product_id').values_list(*_COLUMNS)
+    return list(qs.iterator(chunk_size=5000))
+
+class CatalogSnapshot:
+    _ARRAYS = ('ids', 'brand_id', 'category_id', 'model_year', 'price_cents')
+
+    def __init__(self, version: int, rows: list, category_paths: dict):
+        """``rows`` are tuples in _COLUMNS order, sorted by product_id."""
+        self.version = version
+        self.rows = rows
+        self.category_paths = category_paths
+        n = len(rows)
+        self.ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        self.brand_id = np.fromiter((-1 if r[2] is None else r[2] for r in rows), dtype=np.int64, count=n)
+        self.category_id = np.fromiter((-1 if r[4] is None else r[4] for r in rows), dtype=np.int64, count=n)
+        self.model_year = np.fromiter((r[6] for r in rows), dtype=np.int32, count=n)
+        self.price_cents = np.fromiter((int(r[7] * 100) for r in rows), dtype=np.int64, count=n)
+
+        # names: one haystack of NUL-terminated names plus start offsets for substring search
+        lengths = np.fromiter((len(r[1]) + 1 for r in rows), dtype=np.int64, count=n)
+        self.name_offsets = np.cumsum(lengths) - lengths
+        self.haystack = ''.join(r[1].translate(_ASCII_LOWER) + '\x00' for r in rows)
+
+        # NULL brand/category ids and names rank -1: first ascending, last descending
+        self.rank_values, self.ranks = {}, {}
+        for field, col in _RANKED.items():
+            self.rank_values[field], self.ranks[field] = _ranks([r[col] for r in rows])
+        self._index_sort_keys()
+
+    def _index_sort_keys(self):
+        self.sort_keys = {
+            'product_id': self.ids,
+            'list_price': self.price_cents,
+            'model_year': self.model_year,
+            'brand_id': self.brand_id,
+            'category_id': self.category_id,
+            **self.ranks,
+        }
+
+    @classmethod
+    def load(cls, version: int) -> 'CatalogSnapshot':
+        return cls(version, _load_rows(), dict(Category.objects.values_list('category_id', 'path')))
+
+    def patched(self, product_id: int, row: Optional[tuple], version: int) -> 'CatalogSnapshot':
+        """
+        New snapshot with one product replaced, inserted or (row=None) removed.
+        Readers may still hold this one, so nothing is modified in place; every
+        column is spliced with one array copy and ranks shift only when a new
+        distinct string appears, so the cost is a few memcpys of the catalog,
+        not a rebuild.
+        """
+        snap = object.__new__(CatalogSnapshot)
+        snap.version = version
+        snap.category_paths = self.category_paths
+        snap.rows = list(self.rows)
+        for name in self._ARRAYS:
+            setattr(snap, name, getattr(self, name))
+        snap.name_offsets, snap.haystack = self.name_offsets, self.haystack
+        snap.rank_values, snap.ranks = dict(self.rank_values), dict(self.ranks)
+
+        i = int(np.searchsorted(self.ids, product_id))
+        if i < len(self.rows) and self.rows[i][0] == product_id:
+            snap._remove(i)
+        if row is not None:
+            snap._insert(i, row)
+        snap._index_sort_keys()
+        return snap
+
+    def _remove(self, i: int):
+        name = self.rows.pop(i)[1]
+        for attr in self._ARRAYS:
+            setattr(self, attr, np.delete(getattr(self, attr), i))
+        for field in _RANKED:
+            # a name that disappears leaves a gap in the ranks, which sorts the same
+            self.ranks[field] = np.delete(self.ranks[field], i)
+        start, size = int(self.name_offsets[i]), len(name) + 1
+        self.haystack = self.haystack[:start] + self.haystack[start + size:]
+        offsets = np.delete(self.name_offsets, i)
+        offsets[i:] -= size
+        self.name_offsets = offsets
+
+    def _insert(self, i: int, row: tuple):
+        self.rows.insert(i, row)
+        for attr, value in zip(self._ARRAYS, _numbers(row)):
+            setattr(self, attr, np.insert(getattr(self, attr), i, value))
+        for field, col in _RANKED.items():
+            value, ranks = row[col], self.ranks[field]
+            if value is None:
+                rank = -1
+            else:
+                distinct = self.rank_values[field]
+                rank = bisect_left(distinct, value)
+                if rank == len(distinct) or distinct[rank] != value:
+                    self.rank_values[field] = distinct[:rank] + [value] + distinct[rank:]
+                    ranks = np.where(ranks >= rank, ranks + 1, ranks)
+            self.ranks[field] = np.insert(ranks, i, rank)
+        start = int(self.name_offsets[i]) if i < len(self.name_offsets) else len(self.haystack)
+        name = row[1].translate(_ASCII_LOWER) + '\x00'
+        self.haystack = self.haystack[:start] + name + self.haystack[start:]
+        offsets = np.insert(self.name_offsets, i, start)
+        offsets[i + 1:] += len(name)
+        self.name_offsets = offsets
+
+    def _subtree_ids(self, category_ids: list[int]) -> list[int]:
+        prefixes = tuple(self.category_paths[c] for c in category_ids if c in self.category_paths)
+        found = {c for c, path in self.category_paths.items() if prefixes and path.startswith(prefixes)}
+        return list(found | set(category_ids))
+
+    def _name_mask(self, needle: str):
+        mask = np.zeros(len(self.rows), dtype=bool)
+        needle = needle.translate(_ASCII_LOWER).replace('\x00', '')
+        hay, offsets = self.haystack, self.name_offsets
+        start = 0
+        while True:
+            pos = hay.find(needle, start)
+            if pos < 0:
+                break
+            i = int(np.searchsorted(offsets, pos, side='right')) - 1
+            mask[i] = True
+            if i + 1 >= len(offsets):
+                break
+            start = int(offsets[i + 1])
+        return mask
+
+    def select(self, params: Mapping[str, str], order_field: str, descending: bool):
+        """
+        Row indices matching the list_products filters, in list order, or None
+        when a parameter can't be evaluated here and the DB should answer.
+        """
+        sort_key = self.sort_keys.get(order_field)
+        if sort_key is None:
+            return None
+        # full-text ?q= needs the FTS index (or its LIKE fallback over brand and
+        # category names too); leave it to the DB whatever the ordering
+        if (params.get('q') or '').strip():
+            return None
+        mask = np.ones(len(self.rows), dtype=bool)
+
+        name = (params.get('name') or '').strip()
+        if name:
+            mask &= self._name_mask(name)
+
+        b_ids = _csv_ints(params.get('brand_id'))
+        if b_ids:
+            mask &= np.isin(self.brand_id, b_ids)
+
+        c_ids = _csv_ints(params.get('category_id'))
+        if c_ids:
+            mask &= np.isin(self.category_id, self._subtree_ids(c_ids))
+
+        for key, column, rounding, op in (
+            ('min_price', self.price_cents, ROUND_CEILING, np.greater_equal),
+            ('max_price', self.price_cents, ROUND_FLOOR, np.less_equal),
+        ):
+            value = params.get(key)
+            if value not in (None, ''):
+                cents = _cents(value, rounding)
+                if cents is None:
+                    return None
+                mask &= op(column, cents)
+
+        for key, op in (('min_year', np.greater_equal), ('max_year', np.less_equal)):
+            value = params.get(key)
+            if value not in (None, ''):
+                try:
+                    year = int(value)
+                except ValueError:
+                    return None
+                mask &= op(self.model_year, year)
+
+        idx = np.flatnonzero(mask)
+        if order_field == 'product_id':
+            order = idx
+        else:
+            # ties broken on product_id, exactly like the SQL ordering
+            order = idx[np.lexsort((self.ids[idx], sort_key[idx]))]
+        return order[::-1] if descending else order
+
+    def values(self, indices) -> List[Dict]:
+        """Rows shaped like list_products' values() dicts."""
+        rows = self.rows
+        return [dict(zip(_COLUMNS, rows[i])) for i in indices.tolist()]
+
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    global _snapshot
+    if not enabled():
+        return None
+    version = catalog_version()
+    snap = _snapshot
+    if snap is not None and snap.version == version:
+        return snap
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CatalogSnapshot.load(version)
+        return _snapshot
+
+def product_changed(product_id: int, previous: int | None, version: int, deleted: bool):
+    """
+    Called after a product write commits and bumped the catalog version from
+    ``previous`` to ``version``. Patches the snapshot when this write is the
+    only catalog change since it was built; otherwise leaves it stale so
+    get_snapshot() reloads it.
+    """
+    global _snapshot
+    snap = _snapshot
+    if snap is None or previous is None or snap.version != previous:
+        return
+    # read outside the lock so readers only wait for the array splice
+    row = None
+    if not deleted:
+        row = Product.objects.filter(pk=product_id).values_list(*_COLUMNS).first()
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != previous:
+            return
+        _snapshot = snap.patched(product_id, row, version)
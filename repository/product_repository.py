@@ -1,6 +1,49 @@
-from typing import Mapping, List, Dict
+import json
+from typing import Mapping, List, Dict, Iterator
+from decimal import Decimal, InvalidOperation
 from math import ceil
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.expressions import RawSQL
 from api.product.models import Product
+from repository import product_columns, product_search
+from repository.catalog_cache import catalog_version, versioned_key
+from repository.category_repository import subtree_ids
+from repository.pagination import page_with_total
+
+CURSOR_SALT = "product-list-cursor"
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+COUNT_CACHE_TIMEOUT = 60 * 10
+# count=estimate never scans more than this many rows on a cache miss
+ESTIMATE_CAP = 1000
+
+# facet name -> the filters it ignores, so a sidebar still shows the other options
+FACET_FILTERS = {
+    'brand': ('brand_id',),
+    'category': ('category_id',),
+    'year': ('min_year', 'max_year'),
+    'price': ('min_price', 'max_price'),
+}
+# response key -> values() lookup; brand/category names are the only joins
+PRODUCT_FIELDS = {
+    'product_id': 'product_id',
+    'product_name': 'product_name',
+    'brand_id': 'brand_id',
+    'brand_name': 'brand__brand_name',
+    'category_id': 'category_id',
+    'category_name': 'category__category_name',
+    'model_year': 'model_year',
+    'list_price': 'list_price',
+}
+EXPORT_CHUNK_SIZE = 2000
+# per-product entries for detail / ?ids= lookups, evicted by the write signals
+PRODUCT_CACHE_TIMEOUT = 60 * 60
+MAX_IDS = 100
+# [min, max) price bands for the price facet; None = open ended
+PRICE_BANDS = [(0, 500), (500, 1000), (1000, 2000), (2000, 5000), (5000, None)]
+FACET_CACHE_TIMEOUT = 60 * 10
 
 _FIELD_MAP = {
     'id': 'product_id', 'product_id': 'product_id',
@@ -27,85 +70,449 @@ def _to_int(x, default=0, min_val=None, max_val=None):
     if max_val is not None and v > max_val: v = max_val
     return v
 
-def list_products(params: Mapping[str, str]) -> Dict:
+def _cursor_value(v):
+    return str(v) if isinstance(v, Decimal) else v
+
+def _encode_cursor(field: str, descending: bool, row: Dict, backwards: bool) -> str:
+    return signing.dumps({
+        "o": field, "d": descending,
+        "k": _cursor_value(row[field]), "id": row['product_id'],
+        "b": backwards,
+    }, salt=CURSOR_SALT)
+
+def _decode_cursor(cursor: str, field: str, descending: bool) -> Dict:
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValueError("invalid cursor")
+    if data.get("o") != field or data.get("d") != descending:
+        raise ValueError("cursor does not match order_by/order")
+    return data
+
+def _keyset_q(field: str, key, pk: int, descending: bool) -> Q:
+    """Rows strictly after (key, pk); NULLs sort first ascending, last descending."""
+    op = 'lt' if descending else 'gt'
+    after_pk = Q(**{'product_id__' + op: pk})
+    if field == 'product_id':
+        return after_pk
+    if key is None:
+        if descending:
+            return Q(**{field + '__isnull': True}) & after_pk
+        return (Q(**{field + '__isnull': True}) & after_pk) | Q(**{field + '__isnull': False})
+    q = Q(**{field + '__' + op: key}) | (Q(**{field: key}) & after_pk)
+    if descending:
+        q |= Q(**{field + '__isnull': True})
+    return q
+
+def _keyset_order(field: str, descending: bool) -> list:
+    if descending:
+        order = [F(field).desc(nulls_last=True)]
+    else:
+        order = [F(field).asc(nulls_first=True)]
+    if field != 'product_id':
+        order.append(F('product_id').desc() if descending else F('product_id').asc())
+    return order
+
+def _search(qs, text: str):
+    """
+    ?q= full-text search over product, brand and category names (prefix match
+    per word) through the FTS5 index; LIKE scans only if FTS5 is unavailable.
+    """
+    if product_search.search_available():
+        match = product_search.match_expression(text)
+        if not match:
+            return qs
+        sql, args = product_search.match_ids_sql(match)
+        return qs.filter(product_id__in=RawSQL(sql, args))
+    return qs.filter(
+        Q(product_name__icontains=text)
+        | Q(brand__brand_name__icontains=text)
+        | Q(category__category_name__icontains=text)
+    )
+
+def _with_relevance(qs, text: str):
+    match = product_search.match_expression(text)
+    sql, args = product_search.rank_sql(match)
+    return qs.annotate(search_rank=RawSQL(sql, args))
+
+def _filtered_queryset(params: Mapping[str, str], skip=()):
+    """Apply the list filters; ``skip`` names params to ignore (used by facets)."""
     qs = Product.objects.select_related('brand', 'category').all()
 
     name = (params.get('name') or '').strip()
     if name:
         qs = qs.filter(product_name__icontains=name)
 
-    b_ids = _csv_ints(params.get('brand_id'))
+    q = (params.get('q') or '').strip()
+    if q:
+        qs = _search(qs, q)
+
+    b_ids = _csv_ints(params.get('brand_id')) if 'brand_id' not in skip else []
     if b_ids:
         qs = qs.filter(brand_id__in=b_ids)
 
-    c_ids = _csv_ints(params.get('category_id'))
+    c_ids = _csv_ints(params.get('category_id')) if 'category_id' not in skip else []
     if c_ids:
-        qs = qs.filter(category_id__in=c_ids)
+        # a category matches its whole subtree
+        qs = qs.filter(category_id__in=subtree_ids(c_ids))
 
     min_price = params.get('min_price')
-    if min_price not in (None, ''):
+    if min_price not in (None, '') and 'min_price' not in skip:
         qs = qs.filter(list_price__gte=min_price)
 
     max_price = params.get('max_price')
-    if max_price not in (None, ''):
+    if max_price not in (None, '') and 'max_price' not in skip:
         qs = qs.filter(list_price__lte=max_price)
 
     min_year = params.get('min_year')
-    if min_year not in (None, ''):
+    if min_year not in (None, '') and 'min_year' not in skip:
         qs = qs.filter(model_year__gte=min_year)
 
     max_year = params.get('max_year')
-    if max_year not in (None, ''):
+    if max_year not in (None, '') and 'max_year' not in skip:
         qs = qs.filter(model_year__lte=max_year)
 
-    order_by_key = (params.get('order_by') or 'id').strip().lstrip('+').lower()
+    return qs
+
+def _norm_number(v, cast):
+    if v in (None, ''):
+        return None
+    try:
+        return str(cast(v))
+    except (InvalidOperation, TypeError, ValueError):
+        return str(v)
+
+def _filter_signature(params: Mapping[str, str]) -> str:
+    """Canonical form of the filters, so equivalent queries share a cache entry."""
+    q = (params.get('q') or '').strip()
+    return json.dumps({
+        "name": (params.get('name') or '').strip(),
+        # the LIKE fallback matches q verbatim, so only FTS5 may fold it
+        "q": product_search.match_expression(q) if product_search.search_available() else q,
+        "brand_id": sorted(set(_csv_ints(params.get('brand_id')))),
+        "category_id": sorted(set(_csv_ints(params.get('category_id')))),
+        "min_price": _norm_number(params.get('min_price'), lambda v: Decimal(v).normalize()),
+        "max_price": _norm_number(params.get('max_price'), lambda v: Decimal(v).normalize()),
+        "min_year": _norm_number(params.get('min_year'), int),
+        "max_year": _norm_number(params.get('max_year'), int),
+    }, sort_keys=True)
+
+def _count_mode(params: Mapping[str, str], default: str) -> str:
+    mode = (params.get('count') or default).strip().lower()
+    return mode if mode in COUNT_MODES else default
+
+def _count_key(params: Mapping[str, str]) -> str:
+    return versioned_key('product-count', _filter_signature(params))
+
+def _count_products(qs, params: Mapping[str, str], mode: str) -> tuple[int | None, bool, int | None]:
+    """
+    Returns (total, exact, lower bound). Exact totals are cached per filter
+    signature and catalog version, so any Product/Brand/Category write
+    invalidates them. An estimate past ESTIMATE_CAP has no total, only the
+    lower bound "more than ESTIMATE_CAP".
+    """
+    if mode == 'none':
+        return None, False, None
+
+    key = _count_key(params)
+    total = cache.get(key)
+    if total is not None:
+        return total, True, None
+
+    if mode == 'estimate':
+        capped = qs.order_by()[:ESTIMATE_CAP + 1].count()
+        if capped > ESTIMATE_CAP:
+            return None, False, ESTIMATE_CAP
+        total = capped
+    else:
+        total = qs.count()
+    cache.set(key, total, COUNT_CACHE_TIMEOUT)
+    return total, True, None
+
+def _facet_rows(name: str, qs) -> List[Dict]:
+    """One grouped aggregate query per facet."""
+    qs = qs.order_by()
+    if name == 'brand':
+        rows = qs.values('brand_id', 'brand__brand_name').annotate(count=Count('product_id'))
+        return [
+            {"brand_id": r['brand_id'], "brand_name": r['brand__brand_name'], "count": r['count']}
+            for r in rows.order_by('-count', 'brand__brand_name')
+        ]
+    if name == 'category':
+        rows = qs.values('category_id', 'category__category_name').annotate(count=Count('product_id'))
+        return [
+            {"category_id": r['category_id'], "category_name": r['category__category_name'], "count": r['count']}
+            for r in rows.order_by('-count', 'category__category_name')
+        ]
+    if name == 'year':
+        rows = qs.values('model_year').annotate(count=Count('product_id'))
+        return list(rows.order_by('-model_year'))
+
+    # price: every band counted in a single pass with conditional aggregates
+    bands = {}
+    for i, (lo, hi) in enumerate(PRICE_BANDS):
+        cond = Q(list_price__gte=lo)
+        if hi is not None:
+            cond &= Q(list_price__lt=hi)
+        bands[f'band_{i}'] = Count('product_id', filter=cond)
+    counts = qs.aggregate(**bands)
+    return [
+        {"min": lo, "max": hi, "count": counts[f'band_{i}']}
+        for i, (lo, hi) in enumerate(PRICE_BANDS)
+    ]
+
+def _facets(params: Mapping[str, str]) -> Dict:
+    """
+    ?facets=brand,category,year,price -> counts for the current filters where
+    each facet ignores its own filter. Cached per catalog version.
+    """
+    names = [n.strip().lower() for n in (params.get('facets') or '').split(',')]
+    out = {}
+    for name in names:
+        if name not in FACET_FILTERS or name in out:
+            continue
+        skip = FACET_FILTERS[name]
+        scoped = {k: v for k, v in params.items() if k not in skip}
+        key = versioned_key('product-facet-' + name, _filter_signature(scoped))
+        rows = cache.get(key)
+        if rows is None:
+            rows = _facet_rows(name, _filtered_queryset(params, skip=skip))
+            cache.set(key, rows, FACET_CACHE_TIMEOUT)
+        out[name] = rows
+    return out
+
+def requested_fields(params: Mapping[str, str]) -> tuple:
+    """?fields=product_id,list_price -> response keys in PRODUCT_FIELDS order (all by default)."""
+    wanted = {f.strip().lower() for f in (params.get('fields') or '').split(',')}
+    return tuple(f for f in PRODUCT_FIELDS if f in wanted) or tuple(PRODUCT_FIELDS)
+
+def _value_rows(qs, fields=tuple(PRODUCT_FIELDS), order_field='product_id'):
+    """
+    values() limited to ``fields``, so unrequested brand/category names add no
+    JOIN; product_id and the sort key are always read because cursors need them.
+    """
+    lookups = [PRODUCT_FIELDS[f] for f in fields]
+    for extra in ('product_id', order_field):
+        if extra not in lookups:
+            lookups.append(extra)
+    return qs.values(*lookups)
+
+def _values(qs, fields=tuple(PRODUCT_FIELDS), order_field='product_id') -> List[Dict]:
+    return list(_value_rows(qs, fields, order_field))
+
+def _serialize_row(d: Dict, fields=tuple(PRODUCT_FIELDS)) -> Dict:
+    if 'brand__brand_name' in d:
+        d['brand_name'] = d.pop('brand__brand_name')
+    if 'category__category_name' in d:
+        d['category_name'] = d.pop('category__category_name')
+    for k in [k for k in d if k not in fields]:
+        del d[k]
+    return d
+
+def _serialize(rows: List[Dict], fields=tuple(PRODUCT_FIELDS)) -> List[Dict]:
+    for d in rows:
+        _serialize_row(d, fields)
+    return rows
+
+def _list_products_keyset(qs, params, order_field, descending):
+    """
+    Cursor mode: WHERE (sort_key, product_id) > last seen row instead of OFFSET,
+    so every page costs the same no matter how deep the client has scrolled.
+    The total is skipped unless the client asks for it with count=exact|estimate.
+    """
+    limit = _to_int(params.get('limit') or params.get('page_size'), default=20, min_val=1, max_val=100)
+    cursor = (params.get('cursor') or '').strip()
+    count_mode = _count_mode(params, 'none')
+    total, total_exact, total_lower_bound = _count_products(qs, params, count_mode)
+
+    backwards = False
+    if cursor:
+        data = _decode_cursor(cursor, order_field, descending)
+        backwards = bool(data.get("b"))
+        qs = qs.filter(_keyset_q(order_field, data.get("k"), data.get("id"), descending != backwards))
+    qs = qs.order_by(*_keyset_order(order_field, descending != backwards))
+
+    fields = requested_fields(params)
+    rows = _values(qs[:limit + 1], fields, order_field)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = bool(cursor), more
+
+    next_cursor = _encode_cursor(order_field, descending, rows[-1], False) if rows and has_next else None
+    prev_cursor = _encode_cursor(order_field, descending, rows[0], True) if rows and has_prev else None
+
+    return _serialize(rows, fields), {
+        "total": total,
+        "total_exact": total_exact,
+        "total_lower_bound": total_lower_bound,
+        "count": count_mode,
+        "page": None,
+        "page_size": limit,
+        "total_pages": ceil(total / limit) if total is not None else None,
+        "has_next": has_next,
+        "has_prev": has_prev,
+        "offset": None,
+        "limit": limit,
+        "cursor": cursor or None,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+def _resolve_ordering(qs, params: Mapping[str, str]):
+    q = (params.get('q') or '').strip()
+    searching = bool(q) and product_search.search_available() and bool(product_search.match_expression(q))
+    default_order = 'relevance' if searching else 'id'
+    order_by_key = (params.get('order_by') or default_order).strip().lstrip('+').lower()
     direction = (params.get('order') or 'desc').strip().lower()
     order_field = _FIELD_MAP.get(order_by_key, 'product_id')
-    if direction == 'desc':
-        order_field = '-' + order_field
-    qs = qs.order_by(order_field)
+    if order_by_key == 'relevance' and searching:
+        # best match first with the default order=desc
+        qs = _with_relevance(qs, q)
+        order_field = 'search_rank'
+    return qs, order_by_key, direction, order_field, direction == 'desc'
+
+def explain_list_products(params: Mapping[str, str]) -> Dict[str, str]:
+    """Query plans of the page and count statements list_products issues for ``params``."""
+    qs, _, _, order_field, descending = _resolve_ordering(_filtered_queryset(params), params)
+    limit = _to_int(params.get('limit') or params.get('page_size'), default=20, min_val=1, max_val=100)
+    return {
+        "page": qs.order_by(*_keyset_order(order_field, descending))[:limit + 1].explain(),
+        "count": qs.order_by().values('pk').explain(),
+    }
+
+def _product_key(version: int, product_id: int) -> str:
+    return f"product:{version}:{product_id}"
+
+def get_products(ids: List[int]) -> Dict:
+    """
+    Products by id in request order, served from per-product cache entries;
+    misses are fetched with a single IN query. Raises ValueError past MAX_IDS.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"at most {MAX_IDS} ids per request")
+
+    # keyed by catalog version, so a write in any process retires every entry
+    version = catalog_version()
+    keys = {pk: _product_key(version, pk) for pk in ids}
+    cached = cache.get_many(list(keys.values()))
+    found = {pk: cached[keys[pk]] for pk in ids if keys[pk] in cached}
+    misses = [pk for pk in ids if pk not in found]
+    if misses:
+        qs = Product.objects.select_related('brand', 'category').filter(product_id__in=misses)
+        fetched = {row['product_id']: _serialize_row(row) for row in _value_rows(qs)}
+        cache.set_many({keys[pk]: row for pk, row in fetched.items()}, PRODUCT_CACHE_TIMEOUT)
+        found.update(fetched)
+
+    return {
+        "items": [found[pk] for pk in ids if pk in found],
+        "missing": [pk for pk in ids if pk not in found],
+    }
+
+def get_product(product_id: int) -> Dict | None:
+    items = get_products([product_id])["items"]
+    return items[0] if items else None
+
+def iter_products(params: Mapping[str, str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Every product matching the list_products filters and ordering, read in
+    chunks through a server-side cursor so memory stays flat for any catalog size.
+    """
+    qs, _, _, order_field, descending = _resolve_ordering(_filtered_queryset(params), params)
+    qs = qs.order_by(*_keyset_order(order_field, descending))
+    fields = requested_fields(params)
+    for row in _value_rows(qs, fields, order_field).iterator(chunk_size=chunk_size):
+        yield _serialize_row(row, fields)
+
+def list_products(params: Mapping[str, str]) -> Dict:
+    """
+    Raises ValueError for an invalid or mismatched ``cursor``.
+    """
+    qs, order_by_key, direction, order_field, descending = _resolve_ordering(_filtered_queryset(params), params)
+    ordering = {
+        "order_by": order_by_key,
+        "direction": direction if direction in ("asc", "desc") else "desc",
+    }
+
+    # opt-in keyset pagination: ?cursor= (empty) starts at the first page
+    if 'cursor' in params:
+        items, pagination = _list_products_keyset(qs, params, order_field, descending)
+        data = {"items": items, "pagination": pagination, "ordering": ordering}
+        if params.get('facets'):
+            data["facets"] = _facets(params)
+        return data
+
+    count_mode = _count_mode(params, 'exact')
+    fields = requested_fields(params)
 
     page = params.get('page')
     page_size = params.get('page_size')
     if page or page_size:
         page = _to_int(page, default=1, min_val=1)
         page_size = _to_int(page_size, default=20, min_val=1, max_val=100)
-        total = qs.count()
-        total_pages = ceil(total / page_size) if page_size else 1
         offset = (page - 1) * page_size
         limit = page_size
-        qs = qs[offset: offset + limit]
-        has_next = page < total_pages
-        has_prev = page > 1
     else:
         offset = _to_int(params.get('offset'), default=0, min_val=0)
         limit = _to_int(params.get('limit'), default=0, min_val=0, max_val=100)
-        total = qs.count()
-        if limit > 0:
-            qs = qs[offset: offset + limit]
-
-        page_size = limit if limit > 0 else total or 1
-        page = (offset // page_size) + 1 if page_size else 1
-        total_pages = ceil(total / page_size) if page_size else 1
-        has_next = (offset + page_size) < total
-        has_prev = offset > 0
-
-    items = list(qs.values(
-        'product_id',
-        'product_name',
-        'brand_id', 'brand__brand_name',
-        'category_id', 'category__category_name',
-        'model_year',
-        'list_price',
-    ))
-    for d in items:
-        d['brand_name'] = d.pop('brand__brand_name', None)
-        d['category_name'] = d.pop('category__category_name', None)
+        page_size = None
 
-    return {
+    # the columnar engine answers plain filter/sort listings without SQL
+    snapshot = product_columns.get_snapshot() if order_field != 'search_rank' else None
+    matched = snapshot.select(params, order_field, descending) if snapshot is not None else None
+
+    # one extra row answers has_next without needing the total
+    total_lower_bound = None
+    if matched is not None:
+        total, total_exact = (len(matched), True) if count_mode != 'none' else (None, False)
+        rows = snapshot.values(matched[offset: offset + limit + 1] if limit > 0 else matched)
+    else:
+        rows_qs = _value_rows(qs.order_by(*_keyset_order(order_field, descending)), fields, order_field)
+        total = cache.get(_count_key(params)) if count_mode == 'exact' else None
+        if count_mode == 'exact' and total is None:
+            # uncached exact total: fetch it with the page in a single statement
+            if limit > 0:
+                rows, total = page_with_total(rows_qs, offset, limit + 1)
+            else:
+                rows = list(rows_qs)
+                total = len(rows)
+            cache.set(_count_key(params), total, COUNT_CACHE_TIMEOUT)
+            total_exact = True
+        else:
+            if count_mode == 'exact':
+                total_exact = True
+            else:
+                total, total_exact, total_lower_bound = _count_products(qs, params, count_mode)
+            rows = list(rows_qs[offset: offset + limit + 1] if limit > 0 else rows_qs)
+
+    if limit > 0:
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        has_next = False
+
+    if page_size is None:
+        page_size = limit if limit > 0 else (total if total is not None else len(rows)) or 1
+        page = (offset // page_size) + 1
+    total_pages = ceil(total / page_size) if total is not None else None
+    has_prev = offset > 0
+
+    # cursors let a client switch from offset paging to keyset paging mid-scroll
+    next_cursor = _encode_cursor(order_field, descending, rows[-1], False) if rows and has_next else None
+    prev_cursor = _encode_cursor(order_field, descending, rows[0], True) if rows and has_prev else None
+    items = _serialize(rows, fields)
+
+    data = {
         "items": items,
         "pagination": {
             "total": total,
+            "total_exact": total_exact,
+            "total_lower_bound": total_lower_bound,
+            "count": count_mode,
             "page": page,
             "page_size": page_size,
             "total_pages": total_pages,
@@ -113,9 +520,11 @@ def list_products(params: Mapping[str, str]) -> Dict:
             "has_prev": has_prev,
             "offset": offset,
             "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         },
-        "ordering": {
-            "order_by": order_by_key,
-            "direction": direction if direction in ("asc", "desc") else "desc",
-        },
+        "ordering": ordering,
     }
+    if params.get('facets'):
+        data["facets"] = _facets(params)
+    return data
@@ -0,0 +1,102 @@
+import re
+from django.db import connection
+from django.db.utils import DatabaseError
+from api.brand.models import Brand
+from api.category.models import Category
+from api.product.models import Product
+
+# FTS5 shadow table created by product migration 0002; rowid == product_id
+SEARCH_TABLE = "product_search"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_ready = None
+
+def _select_sql() -> str:
+    return (
+        "SELECT p.product_id, p.product_name, "
+        "COALESCE(b.brand_name, ''), COALESCE(c.category_name, '') "
+        f"FROM {Product._meta.db_table} p "
+        f"LEFT JOIN {Brand._meta.db_table} b ON b.brand_id = p.brand_id "
+        f"LEFT JOIN {Category._meta.db_table} c ON c.category_id = p.category_id"
+    )
+
+def search_available() -> bool:
+    """True when the FTS5 table exists (SQLite built with FTS5 and migrated)."""
+    global _ready
+    if _ready is None:
+        _ready = connection.vendor == "sqlite" and SEARCH_TABLE in connection.introspection.table_names()
+    return _ready
+
+def reset_available():
+    global _ready
+    _ready = None
+
+def match_expression(text: str) -> str:
+    """'trek moun' -> '"trek"* "moun"*' : every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(text or "")
+    return " ".join('"%s"*' % t for t in tokens)
+
+def match_ids_sql(match: str) -> tuple[str, list]:
+    return f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match]
+
+def rank_sql(match: str) -> tuple[str, list]:
+    """Correlated relevance score for the outer product row; higher is better."""
+    return (
+        f"(SELECT -bm25({SEARCH_TABLE}) FROM {SEARCH_TABLE} "
+        f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {Product._meta.db_table}.product_id)"
+    ), [match]
+
+def _reindex(where: str, params: list):
+    if not search_available():
+        return
+    with connection.cursor() as cur:
+        cur.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+            f"(SELECT p.product_id FROM {Product._meta.db_table} p WHERE {where})",
+            params,
+        )
+        cur.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, product_name, brand_name, category_name) "
+            f"{_select_sql()} WHERE {where}",
+            params,
+        )
+
+def index_product(product_id: int):
+    _reindex("p.product_id = %s", [product_id])
+
+def index_products(product_ids: list[int]):
+    if product_ids:
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        _reindex(f"p.product_id IN ({placeholders})", list(product_ids))
+
+def index_brand(brand_id: int):
+    _reindex("p.brand_id = %s", [brand_id])
+
+def index_category(category_id: int):
+    _reindex("p.category_id = %s", [category_id])
+
+def remove_product(product_id: int):
+    if not search_available():
+        return
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [product_id])
+
+def rebuild() -> int:
+    """Recreate the whole index from the catalog tables; returns rows indexed."""
+    if connection.vendor != "sqlite":
+        raise DatabaseError("FTS5 product search requires SQLite")
+    with connection.cursor() as cur:
+        cur.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "product_name, brand_name, category_name, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cur.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cur.execute(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, product_name, brand_name, category_name) {_select_sql()}"
+        )
+        cur.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cur.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        total = cur.fetchone()[0]
+    reset_available()
+    return total
@@ -0,0 +1,175 @@
+# Process-local Bloom filter over active RevokedAuthToken fingerprints. Almost
+# no token is ever revoked, so a filter miss answers "not revoked" without a
+# query and only hits are confirmed against the table. Logouts in other workers
+# are picked up by polling for newer rows every REVOKED_TOKEN_REFRESH_SECONDS,
+# which bounds how long a revoked token can still pass elsewhere.
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from api.customer.models import RevokedAuthToken
+
+logger = logging.getLogger(__name__)
+
+ERROR_RATE = 0.001
+MIN_CAPACITY = 1024
+REBUILD_SECONDS = 60 * 60   # full reload drops fingerprints that have expired
+
+class BloomFilter:
+    """
+    Bit array probed with slices of a hex SHA-256 fingerprint; the digest is
+    already uniform, so it doubles as the k hash functions.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.probes = max(1, min(8, round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fingerprint: str):
+        # 32 bits per probe, so a 64-char fingerprint supplies up to 8 of them
+        for i in range(self.probes):
+            yield int(fingerprint[i * 8:(i + 1) * 8], 16) % self.size
+
+    def add(self, fingerprint: str):
+        for p in self._positions(fingerprint):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(fingerprint))
+
+class RevocationFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0      # highest RevokedAuthToken.pk folded into the filter
+        self._polled = 0.0     # time.monotonic() of the last poll
+        self._built = 0.0
+
+    def _rebuild(self, now: float):
+        # read the high-water mark first: rows committed meanwhile get polled again
+        last = RevokedAuthToken.objects.order_by('-pk').values_list('pk', flat=True).first()
+        rows = list(RevokedAuthToken.objects.filter(expires_at__gt=timezone.now())
+                    .values_list('pk', 'fingerprint'))
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(rows)))
+        for _, fp in rows:
+            bloom.add(fp)
+        self._bloom, self._last_id, self._built = bloom, last or 0, now
+
+    def _poll(self):
+        rows = RevokedAuthToken.objects.filter(pk__gt=self._last_id).values_list('pk', 'fingerprint')
+        for pk, fp in rows:
+            self._bloom.add(fp)
+            self._last_id = max(self._last_id, pk)
+
+    def _current(self) -> BloomFilter:
+        now = time.monotonic()
+        interval = getattr(settings, 'REVOKED_TOKEN_REFRESH_SECONDS', 5)
+        bloom = self._bloom
+        if bloom is not None and now - self._polled < interval:
+            return bloom
+        with self._lock:
+            if self._bloom is not None and now - self._polled < interval:
+                return self._bloom
+            if (self._bloom is None or now - self._built >= REBUILD_SECONDS
+                    or self._bloom.count > self._bloom.capacity):
+                self._rebuild(now)
+            else:
+                self._poll()
+            self._polled = now
+            return self._bloom
+
+    def might_contain(self, fingerprint: str) -> bool:
+        return fingerprint in self._current()
+
+    def add(self, fingerprint: str):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(fingerprint)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+_filter = RevocationFilter()
+
+def is_revoked(fingerprint: str) -> bool:
+    if not _filter.might_contain(fingerprint):
+        return False
+    return RevokedAuthToken.objects.filter(fingerprint=fingerprint, expires_at__gt=timezone.now()).exists()
+
+def revoke(fingerprint: str, expires_at: datetime):
+    RevokedAuthToken.objects.get_or_create(fingerprint=fingerprint, defaults={"expires_at": expires_at})
+    _filter.add(fingerprint)
+
+def reset_revocations():
+    """Forget the filter; the next check reloads it from the table."""
+    _filter.reset()
+
+# ---- purging expired rows ----
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE = 0.05   # seconds between batches, so other writers get the SQLite lock
+
+class PurgeResult(NamedTuple):
+    deleted: int
+    batches: int
+    seconds: float
+
+def purge_expired(batch_size: int = PURGE_BATCH_SIZE, pause: float = PURGE_PAUSE) -> PurgeResult:
+    """
+    Delete expired rows in batches of ``batch_size``, each its own short
+    transaction: the ids come from a range scan on the expires_at index, then
+    one DELETE by primary key. The filter is dropped afterwards so it stops
+    reporting the purged fingerprints.
+    """
+    started = time.monotonic()
+    cutoff = timezone.now()
+    expired = RevokedAuthToken.objects.filter(expires_at__lte=cutoff).order_by('expires_at')
+    deleted = batches = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += RevokedAuthToken.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    if deleted:
+        _filter.reset()
+    return PurgeResult(deleted, batches, time.monotonic() - started)
+
+def _purge_forever(interval: float):
+    while True:
+        time.sleep(interval)
+        close_old_connections()
+        try:
+            result = purge_expired()
+            if result.deleted:
+                logger.info("purged %d expired revoked tokens in %.2fs", result.deleted, result.seconds)
+        except Exception:
+            logger.exception("revoked token purge failed")
+        finally:
+            close_old_connections()
+
+_scheduler = None
+
+def start_purge_scheduler():
+    """
+    Run purge_expired() every REVOKED_TOKEN_PURGE_INTERVAL seconds on a daemon
+    thread; a no-op when the setting is unset or the thread already runs.
+    """
+    global _scheduler
+    interval = getattr(settings, 'REVOKED_TOKEN_PURGE_INTERVAL', None)
+    if not interval or _scheduler is not None:
+        return
+    _scheduler = threading.Thread(target=_purge_forever, args=(interval,), name='revoked-token-purge', daemon=True)
+    _scheduler.start()
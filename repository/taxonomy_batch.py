@@ -0,0 +1,237 @@
+# Batched create/update/delete for the brand and category admin APIs.
+# A batch is validated against one read of the rows it touches, then the
+# accepted operations are applied set-based (bulk_update / one DELETE /
+# bulk_create) inside a single transaction. Rejected items are reported per
+# index and skipped; an error while applying rolls the whole batch back.
+from typing import NamedTuple, List, Dict
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from django.dispatch import Signal
+from django.utils.timezone import now
+from api.product.models import Product
+
+# bulk_create/bulk_update don't send post_save; receivers in
+# api/product/signals.py do the same bookkeeping for a whole batch.
+# Sent with sender=<model>, created=[pk], renamed=[pk].
+taxonomy_batch_saved = Signal()
+
+OPERATIONS = ('create', 'update', 'delete')
+
+def max_batch_size() -> int:
+    return getattr(settings, 'ADMIN_BATCH_MAX_SIZE', 500)
+
+class _Op(NamedTuple):
+    kind: str
+    pk: int | None = None
+    name: str | None = None
+    move: bool = False
+    parent_id: int | None = None
+    error: str | None = None
+
+def _int_or_none(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1   # never matches a row -> reported as not found
+
+def _parse(item, pk_field: str, name_field: str, hierarchical: bool) -> _Op:
+    if not isinstance(item, dict) or item.get('op') not in OPERATIONS:
+        return _Op('invalid', error=f"op must be one of {', '.join(OPERATIONS)}")
+    kind = item['op']
+    pk = _int_or_none(item.get(pk_field)) if kind != 'create' else None
+    if kind != 'create' and pk is None:
+        return _Op(kind, error=f"{pk_field} is required")
+    name = item.get(name_field)
+    if name is not None:
+        name = str(name).strip()
+        if not name:
+            return _Op(kind, pk, error=f"{name_field} cannot be empty")
+    elif kind == 'create':
+        return _Op(kind, error=f"{name_field} is required")
+    move = hierarchical and kind != 'delete' and 'parent_id' in item
+    return _Op(kind, pk, name, move, _int_or_none(item.get('parent_id')) if move else None)
+
+def apply_batch(model, name_field: str, operations, hierarchical: bool = False) -> List[Dict]:
+    """
+    Run ``operations`` (dicts with "op" plus the pk/name/parent_id keys of the
+    single-object admin API) and return one result per item, in order.
+    Raises ValueError when the batch itself is unusable or can't be applied.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    limit = max_batch_size()
+    if len(operations) > limit:
+        raise ValueError(f"at most {limit} operations per batch")
+
+    pk_field = model._meta.pk.name
+    ops = [_parse(item, pk_field, name_field, hierarchical) for item in operations]
+    ids = {o.pk for o in ops if o.pk} | {o.parent_id for o in ops if o.parent_id}
+
+    def key(parent_id, name):
+        # names are unique per parent for categories, globally for brands
+        return (parent_id if hierarchical else None, name.lower())
+
+    try:
+        with transaction.atomic():
+            rows = model.objects.in_bulk(ids)
+            # moved rows keep their name, which may be taken under the new parent
+            names = {o.name.lower() for o in ops if o.name} | {
+                getattr(rows[o.pk], name_field).lower() for o in ops if o.move and o.pk in rows
+            }
+            owner = {
+                key(r[2] if hierarchical else None, r[1]): r[0] for r in model.objects
+                .annotate(name_key=Lower(name_field)).filter(name_key__in=names)
+                .values_list(pk_field, name_field, *(['parent_id'] if hierarchical else []))
+            }
+            owner.update(
+                (key(getattr(r, 'parent_id', None), getattr(r, name_field)), pk) for pk, r in rows.items()
+            )
+            in_use = set(Product.objects.filter(**{f'{pk_field}__in': [o.pk for o in ops if o.kind == 'delete']})
+                         .values_list(pk_field, flat=True).distinct())
+            parent_of, children = {}, {}
+            if hierarchical:
+                # ancestry of every touched row, read off its materialized path
+                for r in rows.values():
+                    chain = [int(x) for x in r.path.strip('/').split('/') if x] or [r.pk]
+                    for parent_id, pk in zip([None] + chain, chain):
+                        parent_of.setdefault(pk, parent_id)
+                for parent_id, pk in model.objects.filter(parent_id__in=rows).values_list('parent_id', pk_field):
+                    children.setdefault(parent_id, set()).add(pk)
+
+            results, saved, creates, renames, moves, deletes = [], [], [], {}, {}, set()
+
+            def live(pk):
+                return pk in rows and pk not in deletes
+
+            def current_key(pk):
+                return key(parent_of.get(pk), renames.get(pk, getattr(rows[pk], name_field)))
+
+            def target_key(o):
+                """The (parent, name) key a create/update leaves its row under."""
+                if o.kind == 'create':
+                    return key(o.parent_id, o.name)
+                return key(o.parent_id if o.move else parent_of.get(o.pk),
+                           o.name or renames.get(o.pk, getattr(rows[o.pk], name_field)))
+
+            def is_ancestor(pk, node):
+                while node is not None:
+                    if node == pk:
+                        return True
+                    node = parent_of.get(node)
+                return False
+
+            def reparent(key, old, new):
+                children.get(old, set()).discard(key)
+                if new is not None:
+                    children.setdefault(new, set()).add(key)
+
+            for index, o in enumerate(ops):
+                result = {'index': index, 'op': o.kind}
+                results.append(result)
+                if o.pk is not None:
+                    result[pk_field] = o.pk
+                error, status = o.error, 400
+                if error is None and o.kind != 'create' and not live(o.pk):
+                    error, status = "Not found", 404
+                elif error is None and o.move and o.parent_id is not None and not live(o.parent_id):
+                    error = "parent_id not found"
+                elif error is None and o.move and is_ancestor(o.pk, o.parent_id):
+                    error = "a category cannot be moved under itself or its descendants"
+                elif error is None and (o.name or o.move) and owner.get(target_key(o), o.pk) != o.pk:
+                    error = f"{name_field} already exists"
+                elif error is None and o.kind == 'delete' and o.pk in in_use:
+                    error = "still referenced by products"
+                elif error is None and o.kind == 'delete' and children.get(o.pk):
+                    error = "still has subcategories"
+                if error:
+                    result.update(status=status, detail=error)
+                    continue
+
+                if o.kind == 'delete':
+                    if owner.get(current_key(o.pk)) == o.pk:
+                        del owner[current_key(o.pk)]
+                    reparent(o.pk, parent_of.get(o.pk), None)
+                    deletes.add(o.pk)
+                    renames.pop(o.pk, None)
+                    moves.pop(o.pk, None)
+                    result['status'] = 204
+                    continue
+
+                if o.kind == 'create':
+                    new = ('new', index)
+                    owner[target_key(o)] = new
+                    reparent(new, None, o.parent_id)
+                    creates.append((result, o))
+                    result['status'] = 201
+                    continue
+
+                if o.name or o.move:
+                    if owner.get(current_key(o.pk)) == o.pk:
+                        del owner[current_key(o.pk)]
+                if o.name:
+                    renames[o.pk] = o.name
+                if o.move:
+                    reparent(o.pk, parent_of.get(o.pk), o.parent_id)
+                    parent_of[o.pk] = o.parent_id
+                    moves[o.pk] = o.parent_id
+                if o.name or o.move:
+                    owner[current_key(o.pk)] = o.pk
+                saved.append((result, rows[o.pk]))
+                result['status'] = 200
+
+            stamp = now()
+            # park renamed and moved rows on placeholder names (unique per pk) so
+            # no intermediate state collides on the unique index: chains like
+            # B->C, A->B, or a node moved next to a sibling deleted in the batch
+            final = {pk: renames.get(pk, getattr(rows[pk], name_field)) for pk in {**renames, **moves}}
+            parked = [rows[pk] for pk in final]
+            if parked:
+                for obj in parked:
+                    setattr(obj, name_field, f"\x00{obj.pk}")
+                model.objects.bulk_update(parked, [name_field])
+            # moves go through Category.save() for the cycle check and subtree path rewrite
+            for pk, parent_id in moves.items():
+                obj = rows[pk]
+                obj.refresh_from_db(fields=['path'])   # an earlier move may have rewritten it
+                obj.parent = model.objects.get(pk=parent_id) if parent_id else None
+                obj.save(update_fields=['parent', 'updated_at'])
+            if deletes and hierarchical:
+                # children before parents (PROTECT): one DELETE per depth, deepest first
+                levels = {}
+                for pk, path in model.objects.filter(pk__in=deletes).values_list(pk_field, 'path'):
+                    levels.setdefault(path.count('/'), []).append(pk)
+                for depth in sorted(levels, reverse=True):
+                    model.objects.filter(pk__in=levels[depth]).delete()
+            elif deletes:
+                model.objects.filter(pk__in=deletes).delete()
+            if parked:
+                for obj in parked:
+                    setattr(obj, name_field, final[obj.pk])
+                    obj.updated_at = stamp
+                model.objects.bulk_update(parked, [name_field, 'updated_at'])
+            created = []
+            if creates:
+                created = model.objects.bulk_create([
+                    model(**{name_field: o.name}, **({'parent_id': o.parent_id} if hierarchical else {}))
+                    for _, o in creates
+                ])
+                if hierarchical:
+                    paths = dict(model.objects.filter(pk__in={o.parent_id for _, o in creates if o.parent_id})
+                                 .values_list(pk_field, 'path'))
+                    for obj in created:
+                        obj.path = f"{paths.get(obj.parent_id, '/')}{obj.pk}/"
+                    model.objects.bulk_update(created, ['path'])
+                saved.extend(zip((result for result, _ in creates), created))
+            if created or renames:
+                taxonomy_batch_saved.send(sender=model, created=[o.pk for o in created], renamed=list(renames))
+    except IntegrityError as e:
+        raise ValueError(f"batch could not be applied, nothing was changed: {e}")
+
+    for result, obj in saved:
+        result.update({pk_field: obj.pk, name_field: getattr(obj, name_field)})
+        if hierarchical:
+            result['parent_id'] = obj.parent_id
+    return results